@@ -1,7 +1,19 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+import json
+import hashlib
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import config
+from ohlcv_store import load_ohlcv
+from feature_store import FeatureSet, feature_store
+from indicators import rsi, atr, pct_change, distance_from_ma, volume_spike
+from asof_alignment import alignment
+import rule_engine
+from trade_labeler import first_touch, label_grid
 
 # --- CONFIGURACIÓN ---
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -13,6 +25,7 @@ SYMBOLS = [
     'NEAR/USDT', 'ATOM/USDT', 'OP/USDT', 'ARB/USDT', 'RNDR/USDT', 'AAVE/USDT'
 ]
 OUTPUT_FILE = "topfinder_dataset_elite.csv"
+STATE_FILE = "topfinder_dataset_state.json" # Última vela con target resuelto por símbolo (modo incremental)
 
 # --- Parámetros de la Estrategia y Target para la IA ---
 TARGET_HORIZON_HOURS = 24 # Plazo máximo de la operación en horas
@@ -20,144 +33,313 @@ TAKE_PROFIT_RR = 1.5      # Ratio de Ganancia (1.5R)
 STOP_LOSS_RR = 1.0        # Ratio de Pérdida (1R)
 ATR_PERIOD = 14           # Período del ATR para calcular la volatilidad y el SL
 
+# --- Rejilla de Targets (opcional) ---
+# Con una rejilla, además de 'target' se añaden columnas target_tp{TP}_sl{SL}_h{H} para cada
+# combinación, calculadas en una sola pasada. None para desactivarlo.
+LABEL_GRID = None # p. ej. {'tp': [1.0, 1.5, 2.0], 'sl': [0.75, 1.0, 1.5], 'horizon': [12, 24, 48]}
+
+# --- Paralelismo ---
+WORKERS = os.cpu_count() or 1 # Procesos para construir los símbolos en paralelo (1 = secuencial)
+
 # --- Filtro para Crear el Dataset ---
 SCORE_THRESHOLD = 10 # Umbral de score del sistema antiguo para pre-filtrar señales
 
-# --- FUNCIONES ---
+# Reglas del score: en cada regla solo puntúa el primer escalón que se cumple (if/elif)
+QUALITY_RULES = {
+    'rsi_4h_extremo': [(('rsi_4h', '>', 85), 10), (('rsi_4h', '>', 75), 5)],
+    'sobreextension_ma': [(('distance_from_ma_24h', '>', 0.25), 10), (('distance_from_ma_24h', '>', 0.15), 5)],
+    'bajo_ath': [(('close', '<', ('ath', 0.98)), 5)],
+    'pico_volumen_5m': [(('volume_spike_5m', '>', 3.0), 5)],
+    'mercado_alcista': [([('btc_change_24h', '>', 0.04), ('eth_change_24h', '>', 0.04)], 8)],
+}
 
-def calculate_rsi(series, length=14):
-    """Calcula el RSI manualmente usando solo pandas."""
-    delta = series.diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.ewm(com=length - 1, min_periods=length).mean()
-    avg_loss = loss.ewm(com=length - 1, min_periods=length).mean()
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-def calculate_atr(high, low, close, length=14):
-    """Calcula el ATR manualmente."""
-    high_low = high - low
-    high_close = np.abs(high - close.shift())
-    low_close = np.abs(low - close.shift())
-    tr = pd.DataFrame({'hl': high_low, 'hc': high_close, 'lc': low_close}).max(axis=1)
-    return tr.ewm(com=length - 1, min_periods=length).mean()
+# --- FUNCIONES ---
 
 def fetch_data_from_local_files(symbol):
-    """Lee los datos históricos desde los archivos CSV locales."""
+    """Lee los datos históricos desde el almacén OHLCV local (o sus CSV si aún no están migrados)."""
     timeframes = ['1w', '1d', '4h', '1h', '5m']
     data = {}
     print(f"  Leyendo datos locales para {symbol}...")
-    base_path = "Backtest/data/historico"
-    formatted_symbol = symbol.replace('/', '')
 
     for tf in timeframes:
-        file_path = os.path.join(base_path, tf, f"{formatted_symbol}.csv")
         try:
-            df = pd.read_csv(file_path)
-            df.rename(columns={df.columns[0]: 'timestamp'}, inplace=True)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df.set_index('timestamp', inplace=True)
-            df.columns = [col.lower() for col in df.columns]
+            df = load_ohlcv(symbol, tf)
+            if df is None:
+                print(f"    - ADVERTENCIA: No hay datos locales de {symbol} para {tf}")
+                if tf in ['1h', '5m', '4h']:
+                     return None
+                continue
             data[tf] = df
-        except FileNotFoundError:
-            print(f"    - ADVERTENCIA: No se encontró el archivo para {tf} en la ruta: {file_path}")
-            if tf in ['1h', '5m', '4h']:
-                 return None
         except Exception as e:
-            print(f"    - Error inesperado leyendo {file_path}: {e}")
+            print(f"    - Error inesperado leyendo {symbol} [{tf}]: {e}")
             return None
     return data
 
-def create_advanced_features(altcoin_data, btc_data, eth_data):
-    """Calcula el set completo de features avanzadas."""
+# --- Grupos de features guardados en el feature store (por símbolo y timeframe) ---
+def _price_features(candles):
+    close = candles['close'].to_numpy()
+    return {
+        'change_1h': pct_change(close, 1), 'change_4h': pct_change(close, 4),
+        'change_12h': pct_change(close, 12), 'change_24h': pct_change(close, 24),
+        'distance_from_ma_24h': distance_from_ma(close, 24),
+    }
+
+def _rsi_features(candles):
+    return {'rsi': rsi(candles['close'].to_numpy(), length=14)}
+
+def _volume_spike_features(candles):
+    return {'volume_spike': volume_spike(candles['volume'].to_numpy(), 12)}
+
+PRICE_FEATURES = FeatureSet('antifomo_price', _price_features)
+RSI_FEATURES = FeatureSet('rsi_14', _rsi_features)
+VOLUME_SPIKE_FEATURES = FeatureSet('volume_spike_12', _volume_spike_features)
+
+def compute_features(symbol, timeframe, candles, feature_set):
+    """Features de un grupo: del feature store si se conoce el símbolo, si no se calculan sin guardar."""
+    if symbol is None:
+        return pd.DataFrame(feature_set(candles), index=candles.index)
+    return feature_store.features(symbol, timeframe, candles, feature_set)
+
+def create_advanced_features(altcoin_data, btc_data, eth_data, symbol=None, from_ts=None):
+    """
+    Calcula el set completo de features avanzadas. Con `symbol`, los indicadores se leen
+    del feature store y solo se calculan las velas nuevas. Con `from_ts`, solo se devuelven
+    (y alinean con el contexto) las velas de 1h desde esa fecha.
+    """
     print("    Calculando features...")
-    df = altcoin_data['1h'].copy()
+    df = altcoin_data['1h'].sort_index()
+    hours = df.index
     
+    # El máximo acumulado depende de toda la historia: no pasa por el feature store
     df['ath'] = df['high'].cummax()
-    df['change_1h'] = df['close'].pct_change(periods=1)
-    df['change_4h'] = df['close'].pct_change(periods=4)
-    df['change_12h'] = df['close'].pct_change(periods=12)
-    df['change_24h'] = df['close'].pct_change(periods=24)
-    df['distance_from_ma_24h'] = (df['close'] - df['close'].rolling(24).mean()) / df['close']
+    price_features = compute_features(symbol, '1h', df, PRICE_FEATURES)
+    for col in price_features.columns:
+        df[col] = price_features[col].to_numpy()
+    if from_ts is not None:
+        df = df[df.index >= from_ts].copy()
+        hours = df.index
 
-    for tf_context in ['1w', '1d', '4h']:
-        if tf_context in altcoin_data:
-            altcoin_data[tf_context][f'rsi_{tf_context}'] = calculate_rsi(altcoin_data[tf_context]['close'], length=14)
-    
-    altcoin_data['5m']['volume_spike_5m'] = altcoin_data['5m']['volume'] / altcoin_data['5m']['volume'].rolling(window=12).mean()
+    # BTC/ETH se alinean por timestamp exacto de la vela de 1h
+    for name, market_data in [('btc_change_24h', btc_data), ('eth_change_24h', eth_data)]:
+        market_1h = market_data['1h'].sort_index()
+        df[name] = alignment(hours, market_1h.index, exact=True).apply(pct_change(market_1h['close'].to_numpy(), 24))
 
-    df['btc_change_24h'] = btc_data['1h']['close'].pct_change(periods=24)
-    df['eth_change_24h'] = eth_data['1h']['close'].pct_change(periods=24)
-    
+    # Contexto: la última vela de cada timeframe con timestamp <= la vela de 1h (as-of hacia atrás)
     for tf_context in ['1w', '1d', '4h']:
-         if tf_context in altcoin_data:
-            df = pd.merge_asof(df.sort_index(), altcoin_data[tf_context][[f'rsi_{tf_context}']].sort_index(), on='timestamp', direction='backward')
-    df = pd.merge_asof(df.sort_index(), altcoin_data['5m'][['volume_spike_5m']].sort_index(), on='timestamp', direction='backward')
-    return df
+        if tf_context in altcoin_data:
+            context = altcoin_data[tf_context].sort_index()
+            context_rsi = compute_features(symbol, tf_context, context, RSI_FEATURES)['rsi'].to_numpy()
+            df[f'rsi_{tf_context}'] = alignment(hours, context.index).apply(context_rsi)
+    candles_5m = altcoin_data['5m'].sort_index()
+    spike_5m = compute_features(symbol, '5m', candles_5m, VOLUME_SPIKE_FEATURES)['volume_spike'].to_numpy()
+    df['volume_spike_5m'] = alignment(hours, candles_5m.index).apply(spike_5m)
+    return df.reset_index()
 
-def calculate_quality_score(row):
-    """Asigna una puntuación a cada vela horaria basada en reglas ponderadas."""
-    score = 0
-    if 'rsi_4h' in row and not pd.isna(row['rsi_4h']):
-        if row['rsi_4h'] > 85: score += 10
-        elif row['rsi_4h'] > 75: score += 5
-    if 'distance_from_ma_24h' in row and not pd.isna(row['distance_from_ma_24h']):
-        if row['distance_from_ma_24h'] > 0.25: score += 10
-        elif row['distance_from_ma_24h'] > 0.15: score += 5
-    if row['close'] < (row['ath'] * 0.98): score += 5
-    if 'volume_spike_5m' in row and not pd.isna(row['volume_spike_5m']):
-        if row['volume_spike_5m'] > 3.0: score += 5
-    if 'btc_change_24h' in row and not pd.isna(row['btc_change_24h']) and 'eth_change_24h' in row and not pd.isna(row['eth_change_24h']):
-        if row['btc_change_24h'] > 0.04 and row['eth_change_24h'] > 0.04: score += 8
-    return score
+def calculate_quality_score(df):
+    """Asigna una puntuación a cada vela horaria según QUALITY_RULES (vectorizado)."""
+    return rule_engine.score(df, QUALITY_RULES)
 
 def define_trade_target(df):
     """
-    Define el target simulando una operación con TP/SL basado en RR y ATR.
+    Define el target simulando una operación SHORT con TP/SL basado en RR y ATR.
     Target = 1 si TP se alcanza antes que SL.
-    Target = 0 si SL se alcanza antes que TP.
+    Target = 0 si SL se alcanza antes que TP (o ambos en la misma vela).
+    NaN si no se resuelve en TARGET_HORIZON_HOURS.
+    `df` debe contener la serie horaria completa: el horizonte son las velas siguientes.
     """
     print("    Definiendo target con simulación de trade (TP/SL)...")
     
-    df['atr'] = calculate_atr(df['high'], df['low'], df['close'], length=ATR_PERIOD)
-    
-    targets = []
-    for i in range(len(df)):
-        entry_price = df['close'].iloc[i]
-        atr_value = df['atr'].iloc[i]
+    df['atr'] = atr(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy(), length=ATR_PERIOD)
 
-        if pd.isna(atr_value):
-            targets.append(np.nan) # Marcar como inválido si no hay ATR
-            continue
+    # Definimos TP y SL para un SHORT
+    entry_price = df['close'].to_numpy()
+    stop_loss_price = entry_price + (df['atr'].to_numpy() * STOP_LOSS_RR)
+    take_profit_price = entry_price - (df['atr'].to_numpy() * TAKE_PROFIT_RR)
 
-        # Definimos TP y SL para un SHORT
-        stop_loss_price = entry_price + (atr_value * STOP_LOSS_RR)
-        take_profit_price = entry_price - (atr_value * TAKE_PROFIT_RR)
+    outcome, _, _ = first_touch(df['high'], df['low'], stop_loss_price, take_profit_price,
+                                horizon=TARGET_HORIZON_HOURS, side='short')
+    df['target'] = outcome
 
-        horizon_candles = df.iloc[i+1 : i+1+TARGET_HORIZON_HOURS]
-        
-        outcome = np.nan # Por defecto, la operación no se resuelve
-        for j in range(len(horizon_candles)):
-            future_high = horizon_candles['high'].iloc[j]
-            future_low = horizon_candles['low'].iloc[j]
-
-            if future_high >= stop_loss_price:
-                outcome = 0 # Perdedora
-                break
-            if future_low <= take_profit_price:
-                outcome = 1 # Ganadora
-                break
-        
-        targets.append(outcome)
-            
-    df['target'] = targets
+    if LABEL_GRID:
+        grid = label_grid(df['high'], df['low'], entry_price, df['atr'], LABEL_GRID['tp'], LABEL_GRID['sl'],
+                          LABEL_GRID['horizon'], side='short')
+        df = pd.concat([df, pd.DataFrame(grid, index=df.index)], axis=1)
     return df
 
+def build_symbol_dataset(symbol, btc_data, eth_data, resolved_until=None):
+    """
+    Construye el dataset parcial (señales filtradas con features y target) de un símbolo.
+    Solo entran velas cuyo horizonte de TARGET_HORIZON_HOURS ya se ha completado; con
+    `resolved_until`, además, solo las posteriores a esa vela (refresco incremental).
+    Devuelve (señales o None, última vela resuelta).
+    """
+    print(f"\n🔄 Procesando {symbol}...")
+    altcoin_data = fetch_data_from_local_files(symbol)
+    if altcoin_data is None: return None, resolved_until
+
+    hours = altcoin_data['1h'].sort_index().index
+    last_resolved = len(hours) - 1 - TARGET_HORIZON_HOURS
+    if last_resolved < 0: return None, resolved_until
+    first_new = 0 if resolved_until is None else int(hours.searchsorted(resolved_until, side='right'))
+    if first_new > last_resolved:
+        print(f"    -> Sin velas nuevas con el horizonte completo para {symbol}.")
+        return None, resolved_until
+
+    # Las velas previas a las nuevas solo sirven de calentamiento para el ATR del target
+    from_ts = None if first_new == 0 else hours[max(first_new - config.FEATURE_WARMUP_BARS, 0)]
+    df_with_features = create_advanced_features(altcoin_data, btc_data, eth_data, symbol, from_ts)
+    
+    print("    Aplicando sistema de puntuación para pre-filtrar señales...")
+    df_with_features['quality_score'] = calculate_quality_score(df_with_features)
+
+    # El target se simula sobre la serie horaria completa (el horizonte son las horas siguientes)
+    df_with_target = define_trade_target(df_with_features)
+    timestamps = df_with_target['timestamp']
+    new_rows = (timestamps >= hours[first_new]) & (timestamps <= hours[last_resolved])
+    
+    # Pre-filtramos solo las señales con un score antiguo alto
+    interesting_signals = df_with_target[new_rows & (df_with_target['quality_score'] >= SCORE_THRESHOLD)].copy()
+    
+    if interesting_signals.empty:
+        print(f"    -> No se encontraron señales interesantes para {symbol} según el score antiguo.")
+        return None, hours[last_resolved]
+    
+    interesting_signals['symbol'] = symbol
+    return interesting_signals, hours[last_resolved]
+
+# --- CONTEXTO BTC/ETH COMPARTIDO ENTRE PROCESOS ---
+# Las features solo usan timestamp y cierre de 1h de BTC/ETH: se publican una vez en
+# memoria compartida y cada proceso los lee sin recibir una copia serializada.
+_worker_context = None
+_worker_segments = []
+
+def share_context(markets: dict) -> tuple:
+    """Copia {nombre: datos} (1h) a memoria compartida. Devuelve (segmentos, descripción para los workers)."""
+    segments, spec = [], {}
+    for name, data in markets.items():
+        candles = data['1h'].sort_index()
+        arrays = {
+            'timestamp': candles.index.values.astype('datetime64[ms]').astype('int64'),
+            'close': candles['close'].to_numpy(dtype='float64'),
+        }
+        spec[name] = {}
+        for field, array in arrays.items():
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+            segments.append(segment)
+            spec[name][field] = (segment.name, array.shape, array.dtype.str)
+    return segments, spec
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _init_worker(spec: dict):
+    """Inicializador de cada proceso: reconstruye BTC/ETH (1h) sobre la memoria compartida."""
+    global _worker_context
+    context = {}
+    for name, fields in spec.items():
+        arrays = {}
+        for field, (segment_name, shape, dtype) in fields.items():
+            segment = _attach(segment_name)
+            _worker_segments.append(segment)
+            arrays[field] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+        index = pd.DatetimeIndex(arrays['timestamp'].astype('datetime64[ms]'), name='timestamp')
+        context[name] = {'1h': pd.DataFrame({'close': arrays['close']}, index=index, copy=False)}
+    _worker_context = context
+
+def _build_in_worker(symbol, resolved_until):
+    return build_symbol_dataset(symbol, _worker_context['btc'], _worker_context['eth'], resolved_until)
+
+def build_all_datasets(symbols: list, btc_data, eth_data, resolved: dict = None, workers: int = WORKERS) -> tuple:
+    """
+    Construye los datasets parciales de todos los símbolos, en paralelo si `workers` > 1.
+    `resolved` ({símbolo: última vela resuelta}) limita cada símbolo a sus velas nuevas.
+    Devuelve (datasets, {símbolo: nueva última vela resuelta}). Los datasets conservan el
+    orden de `symbols`, así que la unión es determinista.
+    """
+    resolved = resolved or {}
+    previous = [resolved.get(symbol) for symbol in symbols]
+    if workers <= 1 or len(symbols) <= 1:
+        results = [build_symbol_dataset(symbol, btc_data, eth_data, since) for symbol, since in zip(symbols, previous)]
+    else:
+        segments, spec = share_context({'btc': btc_data, 'eth': eth_data})
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(symbols)), initializer=_init_worker, initargs=(spec,)) as pool:
+                results = list(pool.map(_build_in_worker, symbols, previous))
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+    datasets = [df for df, _ in results if df is not None]
+    new_resolved = {symbol: until for symbol, (_, until) in zip(symbols, results) if until is not None}
+    return datasets, new_resolved
+
+# --- REFRESCO INCREMENTAL ---
+def dataset_definition() -> str:
+    """Hash de todo lo que define las filas del dataset: si cambia, hay que reconstruirlo entero."""
+    definition = repr((
+        TARGET_HORIZON_HOURS, TAKE_PROFIT_RR, STOP_LOSS_RR, ATR_PERIOD, LABEL_GRID, SCORE_THRESHOLD,
+        QUALITY_RULES, PRICE_FEATURES.digest, RSI_FEATURES.digest, VOLUME_SPIKE_FEATURES.digest,
+    ))
+    return hashlib.blake2b(definition.encode('utf-8'), digest_size=8).hexdigest()
+
+def load_state():
+    """{símbolo: última vela resuelta} del último refresco, o None si hay que reconstruir el dataset."""
+    if not (os.path.exists(STATE_FILE) and os.path.exists(OUTPUT_FILE)):
+        return None
+    try:
+        with open(STATE_FILE, 'r') as f:
+            state = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Estado del dataset ilegible ({e}). Se reconstruye entero.")
+        return None
+    if state.get('definition') != dataset_definition():
+        print("ℹ️ La definición del dataset ha cambiado. Se reconstruye entero.")
+        return None
+    return {symbol: pd.Timestamp(ts) for symbol, ts in state.get('resolved', {}).items()}
+
+def save_state(resolved: dict):
+    state = {
+        'definition': dataset_definition(),
+        'resolved': {symbol: ts.isoformat() for symbol, ts in resolved.items()},
+    }
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=4)
+
+def finalize_dataset(all_datasets: list) -> pd.DataFrame:
+    """Une los datasets parciales y deja solo las columnas de entrenamiento con el target resuelto."""
+    full_dataset = pd.concat(all_datasets)
+    feature_cols = [
+        'change_1h', 'change_4h', 'change_12h', 'change_24h',
+        'btc_change_24h', 'eth_change_24h', 'rsi_1d', 'rsi_4h', 'rsi_1w',
+        'distance_from_ma_24h', 'volume_spike_5m', 'quality_score',
+        'symbol', 'target'
+    ]
+    final_cols = [col for col in feature_cols if col in full_dataset.columns]
+    grid_cols = [col for col in full_dataset.columns if col.startswith('target_')]
+    full_dataset = full_dataset[final_cols + grid_cols]
+    
+    rows_before = len(full_dataset)
+    # Eliminar filas que no se pudieron resolver o no tenían datos. Las columnas de la
+    # rejilla pueden quedar sin resolver (NaN) sin descartar la fila.
+    full_dataset.dropna(subset=final_cols, inplace=True)
+    rows_after = len(full_dataset)
+    if rows_before > rows_after:
+        print(f"\nℹ️ Se eliminaron {rows_before - rows_after} filas con datos incompletos o trades no resueltos.")
+    return full_dataset
+
 # --- EJECUCIÓN PRINCIPAL ---
+# Uso: python 01_create_antifomo_dataset.py [--full]
+# Si ya hay un dataset y su estado, solo se añaden las velas nuevas con el horizonte
+# completo. --full fuerza la reconstrucción desde todo el histórico.
 if __name__ == "__main__":
     print("--- 🛠️ Iniciando Creación de Dataset de IA desde Archivos Locales ---")
+    resolved = None if '--full' in sys.argv else load_state()
+    incremental = resolved is not None
+    print("Modo: refresco incremental" if incremental else "Modo: reconstrucción completa")
     
     print("Cargando datos locales de los líderes del mercado (BTC y ETH)...")
     btc_data = fetch_data_from_local_files('BTC/USDT')
@@ -167,57 +349,31 @@ if __name__ == "__main__":
         print("❌ No se pudieron cargar los datos de BTC/ETH. Saliendo.")
         exit()
     
-    all_datasets = []
     symbols_to_process = SYMBOLS[:]
     if 'BTC/USDT' in symbols_to_process: symbols_to_process.remove('BTC/USDT')
     if 'ETH/USDT' in symbols_to_process: symbols_to_process.remove('ETH/USDT')
-        
-    for symbol in symbols_to_process:
-        print(f"\n🔄 Procesando {symbol}...")
-        altcoin_data = fetch_data_from_local_files(symbol)
-        if altcoin_data is None: continue
-            
-        df_with_features = create_advanced_features(altcoin_data, btc_data, eth_data)
-        
-        print("    Aplicando sistema de puntuación para pre-filtrar señales...")
-        df_with_features['quality_score'] = df_with_features.apply(calculate_quality_score, axis=1)
-        
-        # Pre-filtramos solo las señales con un score antiguo alto
-        interesting_signals = df_with_features[df_with_features['quality_score'] >= SCORE_THRESHOLD].copy()
-        
-        if interesting_signals.empty:
-            print(f"    -> No se encontraron señales interesantes para {symbol} según el score antiguo.")
-            continue
-            
-        df_with_target = define_trade_target(interesting_signals)
-        
-        if not df_with_target.empty:
-            df_with_target['symbol'] = symbol
-            all_datasets.append(df_with_target)
 
-    if not all_datasets:
+    all_datasets, new_resolved = build_all_datasets(symbols_to_process, btc_data, eth_data, resolved)
+
+    if incremental:
+        if all_datasets:
+            new_rows = finalize_dataset(all_datasets)
+            # Mismas columnas y orden que el CSV existente
+            header = pd.read_csv(OUTPUT_FILE, nrows=0).columns
+            new_rows.reindex(columns=header).to_csv(OUTPUT_FILE, mode='a', header=False, index=False)
+            print(f"\n✅ Añadidos {len(new_rows)} registros nuevos a {OUTPUT_FILE}")
+        else:
+            print(f"\nℹ️ No hay registros nuevos para {OUTPUT_FILE}.")
+        save_state({**resolved, **new_resolved})
+    elif not all_datasets:
         print("\n❌ No se pudieron generar datos para el dataset final.")
     else:
-        full_dataset = pd.concat(all_datasets)
-        feature_cols = [
-            'change_1h', 'change_4h', 'change_12h', 'change_24h',
-            'btc_change_24h', 'eth_change_24h', 'rsi_1d', 'rsi_4h', 'rsi_1w',
-            'distance_from_ma_24h', 'volume_spike_5m', 'quality_score',
-            'symbol', 'target'
-        ]
-        final_cols = [col for col in feature_cols if col in full_dataset.columns]
-        full_dataset = full_dataset[final_cols]
-        
-        rows_before = len(full_dataset)
-        full_dataset.dropna(inplace=True) # Eliminar filas que no se pudieron resolver o no tenían datos
-        rows_after = len(full_dataset)
-        if rows_before > rows_after:
-            print(f"\nℹ️ Se eliminaron {rows_before - rows_after} filas con datos incompletos o trades no resueltos.")
-
+        full_dataset = finalize_dataset(all_datasets)
         full_dataset.to_csv(OUTPUT_FILE, index=False)
+        save_state(new_resolved)
         
         print(f"\n✅ Dataset de ÉLITE guardado en: {OUTPUT_FILE}")
         print(f"Total de registros para entrenar: {len(full_dataset)}")
         if not full_dataset.empty:
             print("\nDistribución del Target:")
-            print(full_dataset['target'].value_counts(normalize=True))
\ No newline at end of file
+            print(full_dataset['target'].value_counts(normalize=True))
@@ -6,6 +6,7 @@ import joblib
 import warnings
 import matplotlib.pyplot as plt
 import seaborn as sns
+from dataset_cache import load_dataset
 
 # --- CONFIGURACIÓN ---
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -18,7 +19,7 @@ if __name__ == "__main__":
     
     # 1. Cargar el dataset que creaste con el script 01
     try:
-        df = pd.read_csv(DATASET_FILE)
+        df = load_dataset(DATASET_FILE)
         print(f"✅ Dataset '{DATASET_FILE}' cargado con {len(df)} registros.")
     except FileNotFoundError:
         print(f"❌ Error: No se encontró el archivo '{DATASET_FILE}'.")
@@ -30,8 +31,8 @@ if __name__ == "__main__":
         exit()
 
     # 2. Definir las 'features' (variables de entrada) y el 'target' (lo que queremos predecir)
-    # Excluimos 'symbol', 'target' y el 'quality_score' antiguo
-    features = [col for col in df.columns if col not in ['symbol', 'target', 'quality_score']]
+    # Excluimos 'symbol', 'target' (y los targets alternativos target_*) y el 'quality_score' antiguo
+    features = [col for col in df.columns if col not in ['symbol', 'target', 'quality_score'] and not col.startswith('target_')]
     target = 'target'
     
     X = df[features]
@@ -3,7 +3,9 @@
 import pandas as pd
 from datetime import datetime, timezone
 import config
-from utils import exchange, resample_dataframe
+from utils import resample_dataframe, scheduler
+from candle_cache import fetch_ohlcv_cached
+from request_scheduler import LANE_DETAIL
 
 def run_analisis_detalle(watchlist: list) -> tuple[list, list]:
     """
@@ -16,7 +18,8 @@ def run_analisis_detalle(watchlist: list) -> tuple[list, list]:
 
     for symbol in watchlist:
         try:
-            ohlcv_5m = exchange.fetch_ohlcv(symbol, config.TIMEFRAME_ANALYSIS, limit=config.OHLCV_LIMIT)
+            with scheduler.lane(LANE_DETAIL):
+                ohlcv_5m = fetch_ohlcv_cached(symbol, config.TIMEFRAME_ANALYSIS, limit=config.OHLCV_LIMIT)
             df_5m = pd.DataFrame(ohlcv_5m, columns=['ts','o','h','l','c','v'])
             if df_5m.empty: continue
             
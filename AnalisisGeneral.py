@@ -1,7 +1,48 @@
 # /AnalisisGeneral.py
 
+import asyncio
 import config
-from utils import exchange
+from utils import exchange, scheduler, create_async_exchange
+from request_scheduler import LANE_SCAN, request_weight
+from ticker_snapshot import ticker_snapshot
+
+# Cliente asíncrono compartido por los escaneos concurrentes (se crea bajo demanda
+# dentro del bucle de eventos que lo usa).
+_async_exchange = None
+
+def _calcular_momentum(symbol: str, ohlcv: list):
+    """Calcula el momentum de la última vela cerrada de 5m. Devuelve None si no es posible."""
+    if len(ohlcv) < 2: return None
+    return _momentum_vela(symbol, ohlcv[-2])
+
+def _momentum_vela(symbol: str, last_closed_candle: list):
+    """Momentum (%) de una vela cerrada [ts, o, h, l, c, v]."""
+    open_price, close_price = last_closed_candle[1], last_closed_candle[4]
+
+    if open_price > 0:
+        momentum_pct = (close_price - open_price) / open_price * 100
+        return {'symbol': symbol, 'momentum_5m': momentum_pct}
+    return None
+
+def _construir_watchlist(momentum_candidates: list) -> list:
+    """Ordena los candidatos por momentum absoluto y devuelve el Top de la watchlist."""
+    if not momentum_candidates:
+        print("  -> No se pudo calcular el momentum para los activos.")
+        return []
+
+    sorted_by_momentum = sorted(momentum_candidates, key=lambda x: abs(x['momentum_5m']), reverse=True)
+    watchlist = [cand['symbol'] for cand in sorted_by_momentum[:config.WATCHLIST_SIZE]]
+
+    if watchlist:
+        print(f"  -> Top {len(watchlist)} 'sospechosos' identificados para Análisis de Detalle.")
+        for cand in sorted_by_momentum[:3]:
+            print(f"    - {cand['symbol']}: Momentum 5m: {cand['momentum_5m']:+.2f}%")
+
+    return watchlist
+
+def _liquid_symbols_scan_lane(snapshot) -> list:
+    with scheduler.lane(LANE_SCAN):
+        return snapshot.liquid_usdt_perps()
 
 def run_analisis_general() -> list:
     """
@@ -9,45 +50,95 @@ def run_analisis_general() -> list:
     a los 'sospechosos' con la variación más fuerte.
     """
     print("Fase 1: Ejecutando Análisis General de Momentum...")
-    
-    all_tickers = exchange.fetch_tickers()
-    liquid_symbols = [
-        symbol for symbol, ticker in all_tickers.items()
-        if symbol.endswith('/USDT:USDT') and ticker.get('quoteVolume', 0) > config.MIN_24H_VOLUME_USD
-    ]
-    
+
+    liquid_symbols = _liquid_symbols_scan_lane(ticker_snapshot)
+
     if not liquid_symbols:
         print("  -> No se encontraron activos con liquidez suficiente.")
         return []
 
     momentum_candidates = []
-    for i, symbol in enumerate(liquid_symbols):
-        print(f"  -> Escaneando {i+1}/{len(liquid_symbols)}: {symbol}", end='\r')
-        try:
-            ohlcv = exchange.fetch_ohlcv(symbol, config.TIMEFRAME_ANALYSIS, limit=3)
-            if len(ohlcv) < 2: continue
-            
-            last_closed_candle = ohlcv[-2]
-            open_price, close_price = last_closed_candle[1], last_closed_candle[4]
-
-            if open_price > 0:
-                momentum_pct = (close_price - open_price) / open_price * 100
-                momentum_candidates.append({'symbol': symbol, 'momentum_5m': momentum_pct})
-        except Exception:
-            continue
-    
+    with scheduler.lane(LANE_SCAN):
+        for i, symbol in enumerate(liquid_symbols):
+            print(f"  -> Escaneando {i+1}/{len(liquid_symbols)}: {symbol}", end='\r')
+            try:
+                ohlcv = exchange.fetch_ohlcv(symbol, config.TIMEFRAME_ANALYSIS, limit=3)
+                candidate = _calcular_momentum(symbol, ohlcv)
+                if candidate: momentum_candidates.append(candidate)
+            except Exception:
+                continue
+
     print("\n  -> Escaneo de momentum completado.")
+    return _construir_watchlist(momentum_candidates)
 
-    if not momentum_candidates:
-        print("  -> No se pudo calcular el momentum para los activos.")
+async def escanear_momentum_async(symbols: list, async_exchange, concurrency: int) -> list:
+    """
+    Descarga en paralelo las últimas velas de 5m de cada símbolo, con como máximo
+    `concurrency` peticiones en vuelo, y devuelve los candidatos con su momentum.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    weight = request_weight('fetch_ohlcv', limit=3)
+
+    async def escanear(symbol):
+        async with semaphore:
+            try:
+                # El cliente asíncrono no pasa por el wrapper: pedimos turno al planificador
+                await asyncio.to_thread(scheduler.acquire, weight, LANE_SCAN)
+                ohlcv = await async_exchange.fetch_ohlcv(symbol, config.TIMEFRAME_ANALYSIS, limit=3)
+                return _calcular_momentum(symbol, ohlcv)
+            except Exception:
+                return None
+
+    results = await asyncio.gather(*(escanear(symbol) for symbol in symbols))
+    return [cand for cand in results if cand]
+
+async def run_analisis_general_async(async_exchange=None, concurrency: int = None, snapshot=ticker_snapshot) -> list:
+    """
+    Versión concurrente de `run_analisis_general` basada en `ccxt.async_support`.
+    Devuelve la misma watchlist, pero el escaneo del universo completo se hace en paralelo.
+    """
+    global _async_exchange
+    print("Fase 1: Ejecutando Análisis General de Momentum (modo concurrente)...")
+
+    if async_exchange is None:
+        if _async_exchange is None:
+            _async_exchange = create_async_exchange()
+        async_exchange = _async_exchange
+    concurrency = concurrency or config.SCAN_CONCURRENCY
+
+    liquid_symbols = await asyncio.to_thread(_liquid_symbols_scan_lane, snapshot)
+
+    if not liquid_symbols:
+        print("  -> No se encontraron activos con liquidez suficiente.")
         return []
-        
-    sorted_by_momentum = sorted(momentum_candidates, key=lambda x: abs(x['momentum_5m']), reverse=True)
-    watchlist = [cand['symbol'] for cand in sorted_by_momentum[:config.WATCHLIST_SIZE]]
-    
-    if watchlist:
-        print(f"  -> Top {len(watchlist)} 'sospechosos' identificados para Análisis de Detalle.")
-        for cand in sorted_by_momentum[:3]:
-            print(f"    - {cand['symbol']}: Momentum 5m: {cand['momentum_5m']:+.2f}%")
-            
-    return watchlist
\ No newline at end of file
+
+    print(f"  -> Escaneando {len(liquid_symbols)} activos con {concurrency} peticiones simultáneas...")
+    momentum_candidates = await escanear_momentum_async(liquid_symbols, async_exchange, concurrency)
+    print(f"  -> Escaneo de momentum completado ({len(momentum_candidates)}/{len(liquid_symbols)} activos).")
+    return _construir_watchlist(momentum_candidates)
+
+def obtener_simbolos_liquidos() -> list:
+    """Universo de perpetuos USDT líquidos (para suscribir el stream de velas)."""
+    return ticker_snapshot.liquid_usdt_perps()
+
+def run_analisis_general_stream(stream) -> list:
+    """
+    Variante de la Fase 1 para el modo WebSocket: calcula el momentum directamente
+    sobre las velas recién cerradas que entregó el stream, sin ninguna petición REST.
+    """
+    print("Fase 1: Ejecutando Análisis General de Momentum (velas del stream)...")
+    closed = stream.closed_candles()
+    if not closed:
+        print("  -> El stream aún no ha entregado velas cerradas.")
+        return []
+
+    momentum_candidates = [cand for cand in (_momentum_vela(s, c) for s, c in closed.items()) if cand]
+    print(f"  -> Momentum calculado para {len(momentum_candidates)} activos.")
+    return _construir_watchlist(momentum_candidates)
+
+async def cerrar_exchange_async():
+    """Cierra la sesión HTTP del cliente asíncrono compartido, si se llegó a crear."""
+    global _async_exchange
+    if _async_exchange is not None:
+        await _async_exchange.close()
+        _async_exchange = None
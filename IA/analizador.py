@@ -2,27 +2,30 @@
 # Analiza el rendimiento histórico de las predicciones IA de reversión
 
 import pandas as pd
-import os
+import registro_predicciones
 
 # === CONFIGURACIÓN ===
-DATASET_LOG = "logs/predicciones_reversion.csv"
 UMBRAL_PROB = 0.75  # Solo analizamos señales fuertes
 
 # === VERIFICACIONES ===
-if not os.path.exists(DATASET_LOG):
+# Los agregados del log ya traen los contadores por símbolo y tramo de probabilidad: no se relee el histórico
+agregados = registro_predicciones.load_aggregates()
+if not agregados["predicciones"].sum():
     print("❌ No existe el archivo de log aún.")
     exit()
 
-df = pd.read_csv(DATASET_LOG)
-df["timestamp"] = pd.to_datetime(df["timestamp"])
-
-# === FILTRO: Solo señales con alta probabilidad ===
-df_senales = df[df["prob_reversion"] >= UMBRAL_PROB]
+# === FILTRO: Solo señales con alta probabilidad y resultado ya conocido ===
+desde_tramo = int(round(UMBRAL_PROB * registro_predicciones.PROB_BINS))
+ranking = pd.DataFrame({
+    "senales": agregados["resueltas"][:, desde_tramo:].sum(axis=1),
+    "aciertos": agregados["aciertos"][:, desde_tramo:].sum(axis=1),
+}, index=pd.Index(agregados["symbols"], name="symbol"))
+ranking = ranking[ranking["senales"] > 0]
 
 # === MÉTRICAS GLOBALES ===
-total = len(df)
-senales = len(df_senales)
-aciertos = df_senales["se_revirtio"].sum()
+total = int(agregados["predicciones"].sum())
+senales = int(ranking["senales"].sum())
+aciertos = int(ranking["aciertos"].sum())
 tasa_acierto = aciertos / senales * 100 if senales > 0 else 0
 
 print(f"📈 Análisis histórico de señales IA")
@@ -34,11 +37,6 @@ print(f"🎯 Tasa de acierto: {tasa_acierto:.2f}%")
 
 # === TOP monedas por tasa de éxito ===
 print("\n🏅 Ranking de monedas (por tasa de éxito en señales):")
-ranking = (
-    df_senales.groupby("symbol")["se_revirtio"]
-    .agg(["count", "sum"])
-    .rename(columns={"count": "senales", "sum": "aciertos"})
-)
 ranking["tasa_acierto_%"] = (ranking["aciertos"] / ranking["senales"]) * 100
 ranking = ranking.sort_values(by="tasa_acierto_%", ascending=False)
 
@@ -1,49 +1,21 @@
 # entrenar_multiples_monedas.py
-# Entrena modelos IA de equilibrio para un conjunto de altcoins especificadas manualmente
+# Entrena modelos IA de equilibrio para un conjunto de altcoins especificadas manualmente.
+# Todo corre en este proceso: BTC se carga una vez y las altcoins se reparten entre varios procesos.
 
-import os
-import subprocess
-import re
+import equilibrio
 
 # === CONFIGURACIÓN ===
 ALTCOINS = ["1INCHUSDT", "ENAUSDT","FETUSDT","ICXUSDT","LAYERUSDT",
             "MOVEUSDT","OMUSDT","SUIUSDT","TAOUSDT","TRUMPUSDT",
             "TURBOUSDT","VIRTUALUSDT"]  # Edita libremente
 TIMEFRAME = "1h"
-
-# === FUNCIONES ===
-def reemplazar_alt_symbol(content, alt):
-    return re.sub(r'ALT_SYMBOL\s*=\s*".+?"', f'ALT_SYMBOL = "{alt}"', content)
-
-def reemplazar_timeframe(content, timeframe):
-    return re.sub(r'TIMEFRAME\s*=\s*".+?"', f'TIMEFRAME = "{timeframe}"', content)
-
-def generar_dataset(alt):
-    print(f"\n📘 Generando dataset para {alt}...")
-    with open("IA/01_generar_dataset_equilibrio.py", "r") as file:
-        content = file.read()
-    content = reemplazar_alt_symbol(content, alt)
-    content = reemplazar_timeframe(content, TIMEFRAME)
-    with open("IA/01_generar_dataset_equilibrio_temp.py", "w") as file:
-        file.write(content)
-    subprocess.run(["python", "IA/01_generar_dataset_equilibrio_temp.py"])
-    os.remove("IA/01_generar_dataset_equilibrio_temp.py")
-
-def entrenar_modelo(alt):
-    print(f"\n🤖 Entrenando modelo IA para {alt}...")
-    with open("IA/02_entrenar_modelo_equilibrio.py", "r", encoding="utf-8") as file:
-        content = file.read()
-    content = reemplazar_alt_symbol(content, alt)
-    content = reemplazar_timeframe(content, TIMEFRAME)
-    with open("IA/02_entrenar_modelo_equilibrio_temp.py", "w", encoding="utf-8") as file:
-        file.write(content)
-    subprocess.run(["python", "IA/02_entrenar_modelo_equilibrio_temp.py"])
-    os.remove("IA/02_entrenar_modelo_equilibrio_temp.py")
+WORKERS = equilibrio.WORKERS  # Procesos en paralelo (1 = secuencial)
 
 # === FLUJO PRINCIPAL ===
 if __name__ == "__main__":
-    for alt in ALTCOINS:
-        generar_dataset(alt)
-        entrenar_modelo(alt)
+    resultados = equilibrio.train_many(ALTCOINS, TIMEFRAME, WORKERS)
+    fallidos = [r["symbol"] for r in resultados if "error" in r]
 
-    print("\n✅ Modelos entrenados para todas las altcoins seleccionadas.")
+    if fallidos:
+        print(f"\n⚠️ No se pudieron entrenar: {', '.join(fallidos)}")
+    print(f"\n✅ Modelos entrenados: {len(resultados) - len(fallidos)}/{len(resultados)} altcoins.")
@@ -0,0 +1,229 @@
+# equilibrio.py
+# Pipeline de los modelos de equilibrio altcoin vs BTC: features, dataset, entrenamiento y
+# entrenamiento en paralelo de varias altcoins. Lo usan los scripts 01/02 y entrenar_multiples_monedas.
+
+import os
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.model_selection import TimeSeriesSplit, cross_validate
+from threadpoolctl import threadpool_limits  # Dependencia de scikit-learn
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ohlcv_store import load_ohlcv
+from feature_store import FeatureSet, feature_store
+from asof_alignment import alignment
+
+# === CONFIGURACIÓN ===
+BTC_SYMBOL = "BTCUSDT"
+TIMEFRAME = "1h"
+HISTORICO_PATH = os.path.join("backtest", "data", "historico")
+DATASET_FOLDER = "datasets_equilibrio"
+MODEL_FOLDER = "modelos_equilibrio"
+WINDOW = 5  # Para correlación y volatilidad
+FEATURE_COLUMNS = [
+    "ret_diff", "ret_diff_3v", "rsi_diff", "macd_diff", "macd_signal_diff",
+    "rolling_corr", "volatility_ratio",
+]
+MODEL_PARAMS = {"max_iter": 300, "learning_rate": 0.1, "max_depth": 6, "random_state": 42}
+CV_SPLITS = 5
+WORKERS = os.cpu_count() or 1
+
+# === FEATURES (guardadas en el feature store) ===
+def equilibrium_features(df):
+    macd = df["close"].ewm(span=12).mean() - df["close"].ewm(span=26).mean()
+    return {
+        "log_return": np.log(df["close"] / df["close"].shift(1)),
+        "rsi": df["close"].diff().rolling(14).mean(),  # Proxy RSI simplificado
+        "macd": macd,
+        "macd_signal": macd.ewm(span=9).mean(),
+    }
+
+EQUILIBRIUM_FEATURES = FeatureSet("equilibrio", equilibrium_features)
+
+# === CARGA ===
+def load_data(symbol, timeframe=TIMEFRAME):
+    df = load_ohlcv(symbol, timeframe, csv_root=HISTORICO_PATH)
+    if df is None:
+        raise FileNotFoundError(f"No hay datos de {symbol} [{timeframe}] en el almacén ni en {HISTORICO_PATH}")
+    df = df.join(feature_store.features(symbol, timeframe, df, EQUILIBRIUM_FEATURES))
+    return df[["close", "volume", "log_return", "rsi", "macd", "macd_signal"]].dropna()
+
+# === MATRIZ DE DESEQUILIBRIOS (todas las altcoins contra BTC a la vez) ===
+# Todas las altcoins se alinean con el eje temporal de BTC en una matriz tiempo × símbolo
+# (NaN donde la altcoin no tiene vela) y las ventanas móviles se calculan para todas las
+# columnas a la vez con sumas acumuladas. Con historiales sin huecos da lo mismo que
+# unir cada par por timestamp y usar `rolling` de pandas.
+
+def rolling_sum(x, window):
+    """Suma móvil de `window` filas por columna. NaN si falta algún valor en la ventana."""
+    valid = ~np.isnan(x)
+    zeros = np.zeros((1,) + x.shape[1:])
+    total = np.concatenate([zeros, np.cumsum(np.where(valid, x, 0.0), axis=0)])
+    count = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = total[window:] - total[:-window]
+        out[window - 1:][count[window:] - count[:-window] < window] = np.nan
+    return out
+
+def _rolling_var(sum_x, sum_xx, window):
+    # Varianza muestral (ddof=1) desde las sumas; el redondeo puede dejarla ligeramente negativa
+    return np.maximum((sum_xx - sum_x * sum_x / window) / (window - 1), 0.0)
+
+def universe_features(btc_df, alt_dfs):
+    """
+    Features de desequilibrio de todas las altcoins ({símbolo: datos de `load_data`}) contra
+    BTC en una pasada. Devuelve {feature: DataFrame tiempo × símbolo} con el índice de BTC.
+    """
+    symbols = list(alt_dfs)
+    columns = ["log_return", "rsi", "macd", "macd_signal"]
+    alts = {col: np.empty((len(btc_df), len(symbols))) for col in columns}
+    for j, symbol in enumerate(symbols):
+        alt_df = alt_dfs[symbol]
+        aligned = alignment(btc_df.index, alt_df.index, exact=True).apply_frame(alt_df, columns)
+        for col in columns:
+            alts[col][:, j] = aligned[col]
+    btc = {col: btc_df[col].to_numpy(dtype=np.float64)[:, None] for col in columns}
+
+    alt_ret, btc_ret = alts["log_return"], btc["log_return"]
+    alt_ret_sum, btc_ret_sum = rolling_sum(alt_ret, WINDOW), rolling_sum(btc_ret, WINDOW)
+    alt_var = _rolling_var(alt_ret_sum, rolling_sum(alt_ret * alt_ret, WINDOW), WINDOW)
+    btc_var = _rolling_var(btc_ret_sum, rolling_sum(btc_ret * btc_ret, WINDOW), WINDOW)
+    cov = (rolling_sum(alt_ret * btc_ret, WINDOW) - alt_ret_sum * btc_ret_sum / WINDOW) / (WINDOW - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.sqrt(alt_var * btc_var)
+    corr[~np.isfinite(corr)] = np.nan
+
+    ret_diff = alt_ret - btc_ret
+    features = {
+        "ret_diff": ret_diff,
+        "ret_diff_3v": rolling_sum(ret_diff, 3),
+        "rsi_diff": alts["rsi"] - btc["rsi"],
+        "macd_diff": alts["macd"] - btc["macd"],
+        "macd_signal_diff": alts["macd_signal"] - btc["macd_signal"],
+        "rolling_corr": corr,
+        "volatility_ratio": np.sqrt(alt_var) / (np.sqrt(btc_var) + 1e-6),
+    }
+    return {name: pd.DataFrame(values, index=btc_df.index, columns=symbols) for name, values in features.items()}
+
+def symbol_features(universe, symbol):
+    """Features de un símbolo sacadas de la matriz, con las filas completas (como `pair_features`)."""
+    return pd.DataFrame({name: universe[name][symbol] for name in FEATURE_COLUMNS}).dropna()
+
+# === DATASET ===
+def pair_features(btc_df, alt_df):
+    """Features de desequilibrio de una altcoin contra BTC (filas con todas las features)."""
+    return symbol_features(universe_features(btc_df, {"alt": alt_df}), "alt")
+
+def build_dataset(btc_df, alt_df):
+    df = pair_features(btc_df, alt_df)
+    # Target: reversión real (el desequilibrio se cierra en 4 velas)
+    df["target"] = (df["ret_diff"].shift(-4).abs() < 0.004).astype(int)
+    return df[FEATURE_COLUMNS + ["target"]].dropna()
+
+def dataset_path(alt_symbol, timeframe=TIMEFRAME):
+    return os.path.join(DATASET_FOLDER, f"dataset_equilibrio_{alt_symbol.lower()}_vs_btc_{timeframe}.csv")
+
+def model_path(alt_symbol, timeframe=TIMEFRAME):
+    return os.path.join(MODEL_FOLDER, f"modelo_equilibrio_{alt_symbol.lower()}_vs_btc_{timeframe}.pkl")
+
+# === ENTRENAMIENTO ===
+def new_model():
+    return HistGradientBoostingClassifier(**MODEL_PARAMS)
+
+def cross_validate_model(X, y, splits=CV_SPLITS):
+    """Validación cruzada temporal. Devuelve {métrica: (media, desviación)}."""
+    resultados = cross_validate(
+        new_model(), X, y, cv=TimeSeriesSplit(n_splits=splits),
+        scoring=["accuracy", "precision", "recall", "f1"],
+        return_train_score=False
+    )
+    return {
+        metrica: (float(np.mean(scores)), float(np.std(scores)))
+        for metrica, scores in resultados.items() if "test" in metrica
+    }
+
+def train_model(df):
+    """Valida y entrena el modelo final con todo el dataset. Devuelve (modelo, métricas)."""
+    X = df.drop("target", axis=1).values
+    y = df["target"].values
+    metricas = cross_validate_model(X, y)
+    modelo = new_model()
+    modelo.fit(X, y)
+    return modelo, metricas
+
+def run_symbol(alt_symbol, btc_df, timeframe=TIMEFRAME):
+    """Dataset + modelo de una altcoin. Guarda ambos y devuelve métricas y tiempos por paso."""
+    t0 = time.perf_counter()
+    df = build_dataset(btc_df, load_data(alt_symbol, timeframe))
+    os.makedirs(DATASET_FOLDER, exist_ok=True)
+    df.to_csv(dataset_path(alt_symbol, timeframe), index=False)
+    t1 = time.perf_counter()
+
+    modelo, metricas = train_model(df)
+    os.makedirs(MODEL_FOLDER, exist_ok=True)
+    joblib.dump(modelo, model_path(alt_symbol, timeframe))
+    t2 = time.perf_counter()
+    return {"symbol": alt_symbol, "rows": len(df), "metrics": metricas,
+            "dataset_s": t1 - t0, "train_s": t2 - t1}
+
+# === VARIAS ALTCOINS EN PARALELO ===
+_worker_btc = None
+
+def _init_worker(btc_df, timeframe):
+    """Cada proceso recibe BTC una sola vez y entrena con un hilo para no competir con los demás."""
+    global _worker_btc
+    _worker_btc = (btc_df, timeframe)
+    threadpool_limits(1)
+
+def _run_in_worker(alt_symbol):
+    btc_df, timeframe = _worker_btc
+    return run_symbol(alt_symbol, btc_df, timeframe)
+
+def train_many(altcoins, timeframe=TIMEFRAME, workers=WORKERS):
+    """
+    Genera datasets y entrena modelos para varias altcoins cargando BTC una sola vez.
+    Informa del progreso y los tiempos de cada símbolo. Devuelve la lista de resultados
+    (en el orden de `altcoins`); un símbolo que falla aparece con su 'error'.
+    """
+    inicio = time.perf_counter()
+    print(f"📥 Cargando {BTC_SYMBOL} [{timeframe}]...")
+    btc_df = load_data(BTC_SYMBOL, timeframe)
+    altcoins = [alt for alt in altcoins if alt != BTC_SYMBOL]
+    workers = max(1, min(workers, len(altcoins)))
+    print(f"🚀 Entrenando {len(altcoins)} modelos de equilibrio con {workers} proceso(s)...")
+
+    resultados = {}
+    def informar(alt, resultado):
+        resultados[alt] = resultado
+        prefijo = f"[{len(resultados)}/{len(altcoins)}]"
+        if "error" in resultado:
+            print(f"{prefijo} ❌ {alt}: {resultado['error']}")
+            return
+        f1 = resultado["metrics"].get("test_f1", (float("nan"), 0))[0]
+        print(f"{prefijo} ✅ {alt}: {resultado['rows']} filas | dataset {resultado['dataset_s']:.1f}s | "
+              f"entrenamiento {resultado['train_s']:.1f}s | f1 {f1:.3f}")
+
+    if workers == 1:
+        for alt in altcoins:
+            try:
+                informar(alt, run_symbol(alt, btc_df, timeframe))
+            except Exception as e:
+                informar(alt, {"symbol": alt, "error": str(e)})
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(btc_df, timeframe)) as pool:
+            futuros = {pool.submit(_run_in_worker, alt): alt for alt in altcoins}
+            for futuro in as_completed(futuros):
+                alt = futuros[futuro]
+                try:
+                    informar(alt, futuro.result())
+                except Exception as e:
+                    informar(alt, {"symbol": alt, "error": str(e)})
+
+    print(f"\n⏱️ Tiempo total: {time.perf_counter() - inicio:.1f}s")
+    return [resultados[alt] for alt in altcoins]
@@ -0,0 +1,151 @@
+# equilibrio_vivo.py
+# Evaluación incremental de las features de equilibrio: guarda el estado de los indicadores de
+# BTC y de cada par y en cada ejecución solo procesa las velas nuevas del almacén.
+
+import os
+import sys
+import math
+import pickle
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ohlcv_store import load_ohlcv
+from streaming_indicators import LogReturn, MeanChange, MACD, NAN
+import equilibrio
+
+# === CONFIGURACIÓN ===
+STATE_PATH = os.path.join(".cache", "equilibrio_vivo.pkl")
+BTC_HISTORY = 24 * 30  # Velas de BTC que se conservan para emparejar altcoins que van retrasadas (un mes en 1h)
+
+def _definition(timeframe):
+    # Si cambian las features o la ventana, el estado guardado ya no sirve
+    return (equilibrio.EQUILIBRIUM_FEATURES.digest, equilibrio.WINDOW, timeframe)
+
+class SymbolIndicators:
+    """Indicadores base de un símbolo (los de `equilibrio.load_data`) alimentados vela a vela."""
+
+    def __init__(self):
+        self.log_return = LogReturn()
+        self.rsi = MeanChange(14)  # Proxy RSI simplificado
+        self.macd = MACD(12, 26, 9)
+        self.last_ts = None
+
+    def update(self, timestamp, close):
+        """Salidas de la vela, o None mientras algún indicador esté calentando (filas que `dropna` quita)."""
+        macd, signal = self.macd.update(close)
+        outputs = {"log_return": self.log_return.update(close), "rsi": self.rsi.update(close),
+                   "macd": macd, "macd_signal": signal}
+        self.last_ts = timestamp
+        return None if any(math.isnan(v) for v in outputs.values()) else outputs
+
+    def new_candles(self, symbol, timeframe, until=None):
+        """(timestamp ms, cierre) de las velas posteriores a la última procesada (hasta `until`)."""
+        start = None if self.last_ts is None else self.last_ts + 1
+        df = load_ohlcv(symbol, timeframe, start=start, end=until, csv_root=equilibrio.HISTORICO_PATH)
+        if df is None:
+            return []
+        timestamps = df.index.values.astype("datetime64[ms]").astype("int64")
+        return list(zip(timestamps.tolist(), df["close"].tolist()))
+
+class PairState:
+    """Estado de un par altcoin/BTC: indicadores de la altcoin y ventanas de las features del par."""
+
+    def __init__(self):
+        self.alt = SymbolIndicators()
+        self.returns = deque(maxlen=equilibrio.WINDOW)  # (retorno alt, retorno BTC)
+        self.diffs = deque(maxlen=3)
+        self.features = None  # Últimas features completas, con su 'timestamp'
+
+    def update(self, timestamp, alt, btc):
+        ret_diff = alt["log_return"] - btc["log_return"]
+        self.returns.append((alt["log_return"], btc["log_return"]))
+        self.diffs.append(ret_diff)
+        if len(self.returns) < equilibrio.WINDOW or len(self.diffs) < 3:
+            return
+
+        n = len(self.returns)
+        mean_alt = sum(a for a, _ in self.returns) / n
+        mean_btc = sum(b for _, b in self.returns) / n
+        var_alt = sum((a - mean_alt) ** 2 for a, _ in self.returns) / (n - 1)
+        var_btc = sum((b - mean_btc) ** 2 for _, b in self.returns) / (n - 1)
+        cov = sum((a - mean_alt) * (b - mean_btc) for a, b in self.returns) / (n - 1)
+        corr = cov / math.sqrt(var_alt * var_btc) if var_alt > 0 and var_btc > 0 else NAN
+        if math.isnan(corr):
+            return  # Igual que `dropna`: la fila no tiene todas las features
+
+        self.features = {
+            "timestamp": timestamp,
+            "ret_diff": ret_diff,
+            "ret_diff_3v": sum(self.diffs),
+            "rsi_diff": alt["rsi"] - btc["rsi"],
+            "macd_diff": alt["macd"] - btc["macd"],
+            "macd_signal_diff": alt["macd_signal"] - btc["macd_signal"],
+            "rolling_corr": corr,
+            "volatility_ratio": math.sqrt(var_alt) / (math.sqrt(var_btc) + 1e-6),
+        }
+
+class LiveEquilibrium:
+    """
+    Features de equilibrio de la última vela de cada par, mantenidas de forma incremental.
+    `refresh` lee del almacén solo las velas posteriores a las ya procesadas; un par nuevo
+    (o que se quedó más atrás que el histórico corto de BTC) se siembra con todo su histórico.
+    """
+
+    def __init__(self, timeframe=equilibrio.TIMEFRAME):
+        self.timeframe = timeframe
+        self.definition = _definition(timeframe)
+        self.btc = SymbolIndicators()
+        self.btc_history = deque(maxlen=BTC_HISTORY)  # (timestamp, salidas de BTC o None)
+        self.pairs = {}
+
+    def _btc_outputs_full(self):
+        # Salidas de BTC sobre todo su histórico, solo para sembrar pares
+        indicators = SymbolIndicators()
+        return {ts: indicators.update(ts, close) for ts, close in indicators.new_candles(equilibrio.BTC_SYMBOL, self.timeframe)}
+
+    def refresh(self, symbols):
+        """Procesa las velas nuevas de BTC y de `symbols`. Devuelve {símbolo: últimas features} (None si no hay)."""
+        for ts, close in self.btc.new_candles(equilibrio.BTC_SYMBOL, self.timeframe):
+            self.btc_history.append((ts, self.btc.update(ts, close)))
+        if self.btc.last_ts is None:
+            raise FileNotFoundError(f"No hay datos de {equilibrio.BTC_SYMBOL} [{self.timeframe}]")
+
+        recent = dict(self.btc_history)
+        full = None
+        latest = {}
+        for symbol in symbols:
+            pair = self.pairs.get(symbol)
+            if pair is None or pair.alt.last_ts is None or pair.alt.last_ts < self.btc_history[0][0]:
+                pair = self.pairs[symbol] = PairState()
+            if pair.alt.last_ts is None and full is None:
+                full = self._btc_outputs_full()
+            btc_outputs = recent if pair.alt.last_ts is not None else full
+
+            # Solo hasta la última vela de BTC: las posteriores se emparejan en la siguiente ejecución
+            for ts, close in pair.alt.new_candles(symbol, self.timeframe, until=self.btc.last_ts):
+                alt = pair.alt.update(ts, close)
+                btc = btc_outputs.get(ts)
+                if alt is not None and btc is not None:
+                    pair.update(ts, alt, btc)
+            latest[symbol] = pair.features
+        return latest
+
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+def load_live(timeframe=equilibrio.TIMEFRAME, path=STATE_PATH):
+    """Estado guardado de la última ejecución, o uno vacío si no existe o ya no es válido."""
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                live = pickle.load(f)
+            if getattr(live, "definition", None) == _definition(timeframe):
+                return live
+            print("ℹ️ Las features de equilibrio han cambiado. Se recalcula el estado.")
+        except Exception as e:
+            print(f"⚠️ Estado de equilibrio ilegible ({e}). Se recalcula.")
+    return LiveEquilibrium(timeframe)
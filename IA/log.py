@@ -1,64 +1,42 @@
 # log_predicciones_diarias.py
 # Registra predicciones IA y verifica si realmente hubo reversión al equilibrio
+# Uso: python IA/log.py             -> predicción de la última vela de cada altcoin
+#      python IA/log.py --backfill  -> predicciones de todo el histórico con su resultado
 
 import os
+import sys
 import json
 import pandas as pd
 import numpy as np
 import joblib
-from datetime import datetime, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import equilibrio
+import equilibrio_vivo
+import registro_predicciones
 
 # === CONFIGURACIÓN ===
 TIMEFRAME = "1h"
-BASE_PATH = f"backtest/data/historico/{TIMEFRAME}"
-DATASET_LOG = "logs/predicciones_reversion.csv"
 MODELOS_FOLDER = "modelos_equilibrio"
 CONFIG_PATH = "backtest/config/activos_en_medicion.json"
 WINDOW_FUTURO = 4
+UMBRAL_REVERSION = 0.001  # |ret_diff| dentro de WINDOW_FUTURO velas por debajo de esto = se revirtió
+BACKFILL_STATE = os.path.join(registro_predicciones.LOG_FOLDER, "_backfill.json")  # Última vela registrada por símbolo
 
 # === FUNCIONES ===
-def load_data(symbol):
-    path = os.path.join(BASE_PATH, f"{symbol}.csv")
-    if not os.path.exists(path):
-        return None
-    df = pd.read_csv(path)
-    df["timestamp"] = pd.to_datetime(df["timestamp_dt"])
-    df.set_index("timestamp", inplace=True)
-    df = df.sort_index()
-    df["log_return"] = np.log(df["close"] / df["close"].shift(1))
-    df["rsi"] = df["close"].diff().rolling(14).mean()
-    df["macd"] = df["close"].ewm(span=12).mean() - df["close"].ewm(span=26).mean()
-    df["macd_signal"] = df["macd"].ewm(span=9).mean()
-    df.dropna(inplace=True)
-    return df[["close", "volume", "log_return", "rsi", "macd", "macd_signal"]]
-
-def evaluar_con_futuro(btc_df, alt_df, modelo, symbol):
-    df = btc_df.join(alt_df, lsuffix="_btc", rsuffix="_alt", how="inner")
-
-    # === Features IA (7)
-    df["ret_diff"] = df["log_return_alt"] - df["log_return_btc"]
-    df["ret_diff_3v"] = df["ret_diff"].rolling(3).sum()
-    df["rsi_diff"] = df["rsi_alt"] - df["rsi_btc"]
-    df["macd_diff"] = df["macd_alt"] - df["macd_btc"]
-    df["macd_signal_diff"] = df["macd_signal_alt"] - df["macd_signal_btc"]
-    df["rolling_corr"] = df["log_return_alt"].rolling(5).corr(df["log_return_btc"])
-    df["volatility_ratio"] = df["log_return_alt"].rolling(5).std() / (df["log_return_btc"].rolling(5).std() + 1e-6)
-    df.dropna(inplace=True)
-
+def evaluar_con_futuro(features, modelo, symbol):
+    """
+    `features`: últimas features del símbolo contra BTC (`LiveEquilibrium.refresh`). La fila
+    lleva el timestamp de su vela para que el backfill la resuelva en lugar de duplicarla.
+    """
     # === Predicción y evaluación futura
-    ret_diff_actual = df["ret_diff"].iloc[-1]
-    ret_diff_futuro = df["ret_diff"].shift(-WINDOW_FUTURO).iloc[-1]
-    X = df[[
-        "ret_diff",
-        "ret_diff_3v",
-        "rsi_diff",
-        "macd_diff",
-        "macd_signal_diff",
-        "rolling_corr",
-        "volatility_ratio"
-    ]].iloc[-1:].values
+    ret_diff_actual = features["ret_diff"]
+    # En la última vela las WINDOW_FUTURO siguientes aún no existen: el resultado queda
+    # pendiente (NaN) y el modo --backfill reemplaza la fila cuando se completa el horizonte
+    ret_diff_futuro = np.nan
+    X = [[features[col] for col in equilibrio.FEATURE_COLUMNS]]
     prob = modelo.predict_proba(X)[0][1]
-    se_revirtio = int(abs(ret_diff_futuro) < 0.001)
+    se_revirtio = np.nan
 
     return {
         "symbol": symbol,
@@ -66,9 +44,68 @@ def evaluar_con_futuro(btc_df, alt_df, modelo, symbol):
         "prob_reversion": prob,
         "ret_diff_futuro": ret_diff_futuro,
         "se_revirtio": se_revirtio,
-        "timestamp": datetime.now(timezone.utc).isoformat()
+        "timestamp": pd.Timestamp(features["timestamp"], unit="ms", tz="UTC").isoformat()
     }
 
+def backfill(modelos):
+    """
+    Predicciones de todas las velas históricas de cada altcoin, con un solo `predict_proba`
+    por modelo. Solo se registran las velas cuyo horizonte de WINDOW_FUTURO velas ya se
+    completó, así que cada fila lleva su resultado; una nueva ejecución añade las velas
+    resueltas desde la anterior y resuelve las filas pendientes que el modo en vivo dejó
+    para esas velas (misma clave símbolo + vela). Devuelve las filas para el log.
+    """
+    btc_df = equilibrio.load_data(equilibrio.BTC_SYMBOL, TIMEFRAME)
+    alt_dfs = {}
+    for symbol in modelos:
+        try:
+            alt_dfs[symbol] = equilibrio.load_data(symbol, TIMEFRAME)
+        except FileNotFoundError:
+            print(f"⚠️ Sin datos de {symbol}")
+    universe = equilibrio.universe_features(btc_df, alt_dfs)
+
+    estado = {}
+    if os.path.exists(BACKFILL_STATE):
+        with open(BACKFILL_STATE, "r") as f:
+            estado = json.load(f)
+
+    filas = []
+    for symbol in alt_dfs:
+        features = equilibrio.symbol_features(universe, symbol)
+        # Mismo horizonte que el target del entrenamiento
+        ret_diff_futuro = features["ret_diff"].shift(-WINDOW_FUTURO)
+        resueltas = ret_diff_futuro.notna().to_numpy()
+        if symbol in estado:
+            resueltas = resueltas & (features.index > pd.Timestamp(estado[symbol]))
+        if not resueltas.any():
+            continue
+
+        try:
+            modelo = joblib.load(modelos[symbol])
+            prob = modelo.predict_proba(features.loc[resueltas, equilibrio.FEATURE_COLUMNS].values)[:, 1]
+        except Exception as e:
+            print(f"⚠️ Error evaluando {symbol}: {e}")
+            continue
+
+        futuro = ret_diff_futuro[resueltas]
+        filas.append(pd.DataFrame({
+            "symbol": symbol,
+            "ret_diff": features.loc[resueltas, "ret_diff"].to_numpy(),
+            "prob_reversion": prob,
+            "ret_diff_futuro": futuro.to_numpy(),
+            "se_revirtio": (futuro.abs() < UMBRAL_REVERSION).astype(int).to_numpy(),
+            "timestamp": futuro.index.strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+        }))
+        estado[symbol] = futuro.index[-1].isoformat()
+        print(f"  {symbol}: {len(futuro)} predicciones")
+
+    if filas:
+        registro_predicciones.append(pd.concat(filas, ignore_index=True))
+        os.makedirs(os.path.dirname(BACKFILL_STATE), exist_ok=True)
+        with open(BACKFILL_STATE, "w") as f:
+            json.dump(estado, f, indent=4)
+    return sum(len(f) for f in filas)
+
 # === FLUJO PRINCIPAL ===
 if __name__ == "__main__":
     os.makedirs("logs", exist_ok=True)
@@ -79,38 +116,49 @@ if __name__ == "__main__":
     if "BTCUSDT" not in activos:
         activos.append("BTCUSDT")
 
-    btc_df = load_data("BTCUSDT")
-    if btc_df is None:
-        print("❌ No se pudo cargar BTCUSDT.")
-        exit()
-
-    logs = []
+    modelos = {}
     for symbol in activos:
         if symbol == "BTCUSDT":
             continue
 
         modelo_path = os.path.join(MODELOS_FOLDER, f"modelo_equilibrio_{symbol.lower()}_vs_btc_{TIMEFRAME}.pkl")
-        if not os.path.exists(modelo_path):
-            continue
+        if os.path.exists(modelo_path):
+            modelos[symbol] = modelo_path
 
-        alt_df = load_data(symbol)
-        if alt_df is None or len(alt_df) < WINDOW_FUTURO + 1:
+    if "--backfill" in sys.argv:
+        print("⏪ Backfill de predicciones sobre el histórico...")
+        try:
+            total = backfill(modelos)
+        except FileNotFoundError:
+            print("❌ No se pudo cargar BTCUSDT.")
+            exit()
+        print(f"\n✅ {total} predicciones históricas añadidas en: {registro_predicciones.LOG_FOLDER}")
+        exit()
+
+    # Solo se procesan las velas nuevas desde la ejecución anterior
+    live = equilibrio_vivo.load_live(TIMEFRAME)
+    try:
+        latest = live.refresh(list(modelos))
+    except FileNotFoundError:
+        print("❌ No se pudo cargar BTCUSDT.")
+        exit()
+    live.save()
+
+    logs = []
+    for symbol, modelo_path in modelos.items():
+        if latest.get(symbol) is None:
             continue
 
         try:
             modelo = joblib.load(modelo_path)
-            fila_log = evaluar_con_futuro(btc_df, alt_df, modelo, symbol)
+            fila_log = evaluar_con_futuro(latest[symbol], modelo, symbol)
             logs.append(fila_log)
         except Exception as e:
             print(f"⚠️ Error evaluando {symbol}: {e}")
 
     # === Guardar logs
     if logs:
-        df_log = pd.DataFrame(logs)
-        if os.path.exists(DATASET_LOG):
-            df_ant = pd.read_csv(DATASET_LOG)
-            df_log = pd.concat([df_ant, df_log], ignore_index=True)
-        df_log.to_csv(DATASET_LOG, index=False)
-        print(f"\n✅ Log actualizado en: {DATASET_LOG}")
+        registro_predicciones.append(logs)
+        print(f"\n✅ Log actualizado en: {registro_predicciones.LOG_FOLDER}")
     else:
         print("⚠️ No se generaron logs hoy.")
@@ -0,0 +1,226 @@
+# registro_predicciones.py
+# Log de predicciones de reversión, solo de añadir y particionado por día en formato columnar:
+#   logs/predicciones_reversion/<AAAA-MM-DD>.npy  -> array estructurado con las filas de ese día (UTC)
+#   logs/predicciones_reversion/_agregados.npz    -> contadores por símbolo y tramo de probabilidad
+# Añadir filas solo toca las particiones de sus días y suma sus contadores, así que escribir y
+# analizar cuestan lo mismo aunque el histórico crezca. Hay una fila por (símbolo, vela): una
+# fila con la misma clave reemplaza a la anterior (p. ej. el backfill resuelve una fila en vivo).
+
+import os
+import glob
+import numpy as np
+import pandas as pd
+
+# === CONFIGURACIÓN ===
+LOG_FOLDER = os.path.join("logs", "predicciones_reversion")
+LEGACY_LOG = os.path.join("logs", "predicciones_reversion.csv")  # Log antiguo de un solo fichero
+AGGREGATES_PATH = os.path.join(LOG_FOLDER, "_agregados.npz")
+COLUMNS = ["symbol", "ret_diff", "prob_reversion", "ret_diff_futuro", "se_revirtio", "timestamp"]
+PROB_BINS = 100  # Tramos de prob_reversion de los agregados (umbrales con dos decimales son exactos)
+BIN_EDGES = np.arange(1, PROB_BINS) / PROB_BINS  # Límites inferiores de los tramos 1..PROB_BINS-1
+AGGREGATES_VERSION = 3  # Si cambia cómo se cuentan las filas, los agregados guardados se recalculan
+
+# Una fila por predicción; se_revirtio: 1/0, o -1 mientras el resultado no se conoce (sin ret_diff_futuro)
+LOG_DTYPE = np.dtype([
+    ("timestamp", "<i8"), ("symbol", "<U20"), ("ret_diff", "<f8"), ("prob_reversion", "<f8"),
+    ("ret_diff_futuro", "<f8"), ("se_revirtio", "i1"),
+])
+PENDING = -1
+
+def _partition(day):
+    return os.path.join(LOG_FOLDER, f"{day}.npy")
+
+def _save(path, arrays, save):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        save(f, arrays)
+    os.replace(tmp_path, path)
+
+def to_records(rows):
+    """Filas (DataFrame o lista de dicts con COLUMNS) -> array estructurado del log."""
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    records = np.empty(len(df), dtype=LOG_DTYPE)
+    timestamps = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+    records["timestamp"] = timestamps.dt.tz_localize(None).to_numpy().astype("datetime64[ms]").astype("i8")
+    records["symbol"] = df["symbol"].astype(str).to_numpy()
+    for col in ("ret_diff", "prob_reversion", "ret_diff_futuro"):
+        records[col] = df[col].to_numpy(dtype="f8")
+    outcome = df["se_revirtio"].to_numpy(dtype="f8")
+    # Sin ret_diff_futuro el resultado no se conoce, aunque la fila traiga un se_revirtio (el log antiguo ponía 0)
+    pending = np.isnan(outcome) | np.isnan(records["ret_diff_futuro"])
+    records["se_revirtio"] = np.where(pending, PENDING, np.nan_to_num(outcome))
+    return records
+
+def prob_bins(prob):
+    """Tramo de cada probabilidad: `prob >= k / PROB_BINS` exactamente cuando el tramo es >= k."""
+    # Con searchsorted sobre los límites no se pierde nada por redondeo (0.29 * 100 = 28.999...)
+    return np.searchsorted(BIN_EDGES, np.nan_to_num(prob), side="right")
+
+# === AGREGADOS ===
+def _empty_aggregates():
+    return {"symbols": np.empty(0, dtype="U20"),
+            "predicciones": np.zeros((0, PROB_BINS), dtype="i8"),
+            "resueltas": np.zeros((0, PROB_BINS), dtype="i8"),
+            "aciertos": np.zeros((0, PROB_BINS), dtype="i8"),
+            "version": np.array(AGGREGATES_VERSION)}
+
+def _keys(records):
+    return np.char.add(np.char.add(records["symbol"], "|"), records["timestamp"].astype("U20"))
+
+def _add_to_aggregates(aggregates, records, sign=1):
+    """Suma (o resta, con `sign=-1`) los contadores de `records` por símbolo y tramo de probabilidad."""
+    symbols = list(aggregates["symbols"])
+    new = sorted(set(np.unique(records["symbol"])) - set(symbols))
+    if new:
+        symbols += new
+        aggregates["symbols"] = np.array(symbols, dtype="U20")
+        for key in ("predicciones", "resueltas", "aciertos"):
+            aggregates[key] = np.vstack([aggregates[key], np.zeros((len(new), PROB_BINS), dtype="i8")])
+
+    index = {symbol: i for i, symbol in enumerate(aggregates["symbols"])}
+    unique, inverse = np.unique(records["symbol"], return_inverse=True)
+    rows = np.array([index[symbol] for symbol in unique], dtype=int)[inverse]
+    bins = prob_bins(records["prob_reversion"])
+    resolved = records["se_revirtio"] != PENDING
+    np.add.at(aggregates["predicciones"], (rows, bins), sign)
+    np.add.at(aggregates["resueltas"], (rows[resolved], bins[resolved]), sign)
+    hits = records["se_revirtio"] == 1
+    np.add.at(aggregates["aciertos"], (rows[hits], bins[hits]), sign)
+    return aggregates
+
+def _write_aggregates(aggregates):
+    os.makedirs(LOG_FOLDER, exist_ok=True)
+    _save(AGGREGATES_PATH, aggregates, lambda f, a: np.savez(f, **a))
+
+def _unresolvable(records):
+    # Filas en vivo antiguas, con la hora de ejecución en vez de la de su vela: no se pueden
+    # resolver nunca y el backfill registra esas velas por su cuenta (duplicarían la predicción)
+    return np.isnan(records["ret_diff_futuro"]) & (records["timestamp"] % 60_000 != 0)
+
+def _repair_partition(path):
+    # Particiones escritas por versiones anteriores del log
+    records = np.load(path)
+    wrong = np.isnan(records["ret_diff_futuro"]) & (records["se_revirtio"] != PENDING)
+    unresolvable = _unresolvable(records)
+    if wrong.any() or unresolvable.any():
+        records["se_revirtio"][wrong] = PENDING
+        records = records[~unresolvable]
+        _save(path, records, np.save)
+    return records
+
+def rebuild_aggregates():
+    """Recalcula los contadores recorriendo todas las particiones (solo si se pierden o desajustan)."""
+    aggregates = _empty_aggregates()
+    for path in sorted(glob.glob(_partition("*"))):
+        aggregates = _add_to_aggregates(aggregates, _repair_partition(path))
+    _write_aggregates(aggregates)
+    return aggregates
+
+def _read_aggregates():
+    if os.path.exists(AGGREGATES_PATH):
+        with np.load(AGGREGATES_PATH, allow_pickle=False) as data:
+            aggregates = {key: data[key] for key in data.files}
+        if int(aggregates.get("version", 1)) == AGGREGATES_VERSION:
+            return aggregates
+        print("ℹ️ Los agregados del log son de una versión anterior. Se recalculan.")
+    return rebuild_aggregates()
+
+def load_aggregates():
+    """{'symbols', 'predicciones', 'resueltas', 'aciertos'}: contadores símbolo × tramo de probabilidad."""
+    _migrate_csv()
+    return _read_aggregates()
+
+# === ESCRITURA Y LECTURA ===
+def _append_records(records):
+    if not len(records):
+        return 0
+    records = np.sort(records, order="timestamp", kind="stable")
+    # Ante claves repetidas dentro del lote gana la última aparición
+    _, last = np.unique(_keys(records)[::-1], return_index=True)
+    records = records[np.sort(len(records) - 1 - last)]
+    days = records["timestamp"].astype("datetime64[ms]").astype("datetime64[D]")
+    bounds = np.flatnonzero(np.diff(days.astype("i8"))) + 1
+    os.makedirs(LOG_FOLDER, exist_ok=True)
+    aggregates = _read_aggregates()
+    for chunk, chunk_days in zip(np.split(records, bounds), np.split(days, bounds)):
+        path = _partition(str(chunk_days[0]))
+        if os.path.exists(path):
+            existing = np.load(path)
+            replaced = np.isin(_keys(existing), _keys(chunk))
+            aggregates = _add_to_aggregates(aggregates, existing[replaced], sign=-1)
+            chunk = np.sort(np.concatenate([existing[~replaced], chunk]), order="timestamp", kind="stable")
+        # Escritura atómica: un lector nunca ve una partición a medias
+        _save(path, chunk, np.save)
+    _write_aggregates(_add_to_aggregates(aggregates, records))
+    return len(records)
+
+def append(rows):
+    """
+    Añade filas (DataFrame o lista de dicts con COLUMNS) al log y a sus agregados. Una fila
+    con el mismo (símbolo, timestamp) que otra ya registrada la reemplaza.
+    """
+    _migrate_csv()
+    return _append_records(to_records(rows))
+
+def read_log(start=None, end=None):
+    """Filas del log (o de los días entre `start` y `end`, 'AAAA-MM-DD') como DataFrame con COLUMNS."""
+    _migrate_csv()
+    chunks = []
+    for path in sorted(glob.glob(_partition("*"))):
+        day = os.path.basename(path)[:-4]
+        if (start is None or day >= start) and (end is None or day <= end):
+            chunks.append(np.load(path, mmap_mode="r"))
+    records = np.concatenate(chunks) if chunks else np.empty(0, dtype=LOG_DTYPE)
+    df = pd.DataFrame({col: records[col] for col in COLUMNS if col != "timestamp"})
+    df["se_revirtio"] = df["se_revirtio"].where(df["se_revirtio"] != PENDING).astype("float64")
+    df["timestamp"] = pd.to_datetime(records["timestamp"], unit="ms", utc=True)
+    return df[COLUMNS]
+
+def _migrate_csv():
+    """Importa una sola vez el log CSV antiguo y las particiones CSV diarias al formato columnar."""
+    sources = sorted(glob.glob(os.path.join(LOG_FOLDER, "*.csv")))
+    if os.path.exists(LEGACY_LOG):
+        sources.insert(0, LEGACY_LOG)
+    if not sources:
+        return
+    # `to_records` deja pendientes las filas del log antiguo que traían se_revirtio = 0 sin ret_diff_futuro
+    records = to_records(pd.concat([pd.read_csv(path) for path in sources], ignore_index=True))
+    added = _append_records(records[~_unresolvable(records)])
+    for path in sources:
+        os.replace(path, path + ".migrado")
+    print(f"ℹ️ {len(sources)} log(s) CSV importados al log columnar ({added} filas).")
+
+def check_aggregates(aggregates=None):
+    """
+    Compara los contadores con el filtro sobre las filas del log (`prob_reversion >= umbral`
+    y resultado conocido) en todos los umbrales de dos decimales. Devuelve los umbrales que no cuadran.
+    """
+    aggregates = _read_aggregates() if aggregates is None else aggregates
+    df = read_log()
+    resolved = df[df["se_revirtio"].notna()]
+    index = pd.Index(aggregates["symbols"], name="symbol")
+    mismatches = []
+    for tramo in range(PROB_BINS):
+        umbral = tramo / PROB_BINS
+        expected = pd.DataFrame({
+            "predicciones": df[df["prob_reversion"] >= umbral].groupby("symbol").size(),
+            "resueltas": resolved[resolved["prob_reversion"] >= umbral].groupby("symbol").size(),
+            "aciertos": resolved[(resolved["prob_reversion"] >= umbral) & (resolved["se_revirtio"] == 1)].groupby("symbol").size(),
+        }).reindex(index, fill_value=0).fillna(0).astype(int)
+        for key in expected:
+            if not np.array_equal(aggregates[key][:, tramo:].sum(axis=1), expected[key].to_numpy()):
+                mismatches.append(umbral)
+                break
+    return mismatches
+
+if __name__ == "__main__":
+    # Uso: python IA/registro_predicciones.py -> migra los CSV, recalcula los agregados y los comprueba
+    _migrate_csv()
+    aggregates = rebuild_aggregates()
+    print(f"✅ Agregados recalculados: {len(aggregates['symbols'])} símbolos, "
+          f"{int(aggregates['predicciones'].sum())} predicciones.")
+    mismatches = check_aggregates(aggregates)
+    if mismatches:
+        print(f"❌ Los agregados no cuadran con el log en los umbrales: {mismatches}")
+    else:
+        print(f"✅ Agregados comprobados contra el log en los {PROB_BINS} umbrales de dos decimales.")
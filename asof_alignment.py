@@ -0,0 +1,83 @@
+# /asof_alignment.py
+
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+_CACHE_SIZE = 64
+ROW_PADDING = np.iinfo('int64').max  # Relleno de los ejes por fila más cortos (nunca es <= una marca)
+
+def to_ms(index) -> np.ndarray:
+    """Timestamps (ms, int64) de un DatetimeIndex, una columna datetime o un array de ms."""
+    values = np.asarray(index)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ms]').astype('int64')
+    return values.astype('int64')
+
+def asof_index(left_ts: np.ndarray, right_ts: np.ndarray, exact: bool = False) -> np.ndarray:
+    """
+    Para cada timestamp de `left_ts`, posición de la última fila de `right_ts` (ordenado)
+    con timestamp <= él, como `merge_asof(direction='backward')`. Con `exact`, solo
+    coincidencias exactas (como alinear por índice). -1 donde no hay fila.
+
+    Si `right_ts` es una matriz (filas, tiempo), cada fila es un eje propio (ordenado y
+    rellenado al final con ROW_PADDING) y `left_ts` trae una marca por fila.
+    """
+    if right_ts.ndim == 2:
+        index = (right_ts <= left_ts[:, None]).sum(axis=1) - 1
+        found = right_ts[np.arange(len(index)), np.maximum(index, 0)]
+    else:
+        index = np.searchsorted(right_ts, left_ts, side='right') - 1
+        found = right_ts[np.maximum(index, 0)] if len(right_ts) else left_ts
+    if exact:
+        index[found != left_ts] = -1
+    return index
+
+class AsofAlignment:
+    """Correspondencia fila a fila entre dos ejes temporales, calculada una vez y aplicable a cualquier columna."""
+
+    def __init__(self, left_ts: np.ndarray, right_ts: np.ndarray, exact: bool = False):
+        self.index = asof_index(left_ts, right_ts, exact)
+        self.missing = self.index < 0
+        self.by_row = right_ts.ndim == 2
+
+    def apply(self, values) -> np.ndarray:
+        """
+        Reordena `values` (alineado con el eje derecho, en su último eje) al eje izquierdo.
+        Con ejes por fila, `values` es (filas, tiempo) y da un valor por fila. NaN donde no hay fila.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape[-1] == 0:
+            return np.full(self.index.shape if self.by_row else values.shape[:-1] + self.index.shape, np.nan)
+        index = np.where(self.missing, 0, self.index)
+        if self.by_row:
+            out = values[np.arange(len(index)), index]
+            out[self.missing] = np.nan
+            return out
+        out = values[..., index]
+        out[..., self.missing] = np.nan
+        return out
+
+    def apply_frame(self, frame: pd.DataFrame, columns: list) -> dict:
+        """{columna: valores alineados} para varias columnas de un DataFrame del eje derecho."""
+        return {col: self.apply(frame[col].to_numpy()) for col in columns}
+
+_cache = OrderedDict()
+
+def _fingerprint(ts: np.ndarray) -> tuple:
+    ts = np.ascontiguousarray(ts, dtype='int64')
+    return ts.shape, hashlib.blake2b(ts.tobytes(), digest_size=16).digest()
+
+def alignment(left_ts, right_ts, exact: bool = False) -> AsofAlignment:
+    """`AsofAlignment` cacheada por contenido de ambos ejes (LRU de las últimas combinaciones)."""
+    left_ts, right_ts = to_ms(left_ts), to_ms(right_ts)
+    key = (_fingerprint(left_ts), _fingerprint(right_ts), exact)
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return cached
+    cached = _cache[key] = AsofAlignment(left_ts, right_ts, exact)
+    if len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+    return cached
@@ -0,0 +1,120 @@
+# /candle_cache.py
+
+import threading
+import time
+from collections import deque
+import config
+from utils import exchange, timeframe_to_ms
+
+class CandleCache:
+    """
+    Caché en memoria de velas OHLCV por (símbolo, timeframe), respaldada por un
+    buffer circular. Tras la primera descarga completa solo pide al exchange las
+    velas posteriores a la última vela cerrada y reemplaza la vela que sigue abierta.
+    """
+
+    def __init__(self, client, max_candles: int = config.CANDLE_CACHE_SIZE):
+        self.client = client
+        self.max_candles = max_candles
+        self._buffers = {}
+        self._streamed = {}  # (símbolo, timeframe) -> instante de la última vela recibida por WebSocket
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.stats = {'full_fetches': 0, 'incremental_fetches': 0, 'candles_downloaded': 0}
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _full_fetch(self, key, limit: int) -> deque:
+        symbol, timeframe = key
+        ohlcv = self.client.fetch_ohlcv(symbol, timeframe, limit=limit)
+        buffer = deque(ohlcv, maxlen=max(self.max_candles, limit))
+        self._buffers[key] = buffer
+        self.stats['full_fetches'] += 1
+        self.stats['candles_downloaded'] += len(ohlcv)
+        return buffer
+
+    def _incremental_fetch(self, key, buffer: deque) -> deque:
+        """Descarga solo la cola nueva y la fusiona. Si hay un hueco, rehace la descarga completa."""
+        symbol, timeframe = key
+        last_ts = buffer[-1][0]
+        missing = int((time.time() * 1000 - last_ts) // timeframe_to_ms(timeframe)) + 1
+        if missing >= len(buffer):
+            return self._full_fetch(key, len(buffer))
+
+        page_limit = missing + 1
+        while True:
+            ohlcv = self.client.fetch_ohlcv(symbol, timeframe, since=last_ts, limit=page_limit)
+            self.stats['incremental_fetches'] += 1
+            self.stats['candles_downloaded'] += len(ohlcv)
+            if not ohlcv: return buffer
+            if ohlcv[0][0] > last_ts:
+                # El exchange no devolvió la vela de enlace: no podemos garantizar continuidad.
+                return self._full_fetch(key, len(buffer))
+
+            self._merge(buffer, ohlcv)
+            # Página llena: puede haber más velas (p. ej. reloj local desfasado).
+            if len(ohlcv) < page_limit or buffer[-1][0] == last_ts:
+                return buffer
+            last_ts = buffer[-1][0]
+
+    @staticmethod
+    def _merge(buffer: deque, ohlcv: list):
+        """Fusiona velas nuevas: parchea la vela en formación y añade las posteriores."""
+        for candle in ohlcv:
+            last_ts = buffer[-1][0]
+            if candle[0] == last_ts:
+                buffer[-1] = candle
+            elif candle[0] > last_ts:
+                buffer.append(candle)
+
+    def get_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> list:
+        """
+        Devuelve las últimas `limit` velas (mismo formato que `fetch_ohlcv`),
+        descargando solo lo que falta respecto al ciclo anterior.
+        """
+        key = (symbol, timeframe)
+        with self._key_lock(key):
+            buffer = self._buffers.get(key)
+            if buffer is None or len(buffer) < limit:
+                buffer = self._full_fetch(key, limit)
+            elif not self._is_streamed(key):
+                buffer = self._incremental_fetch(key, buffer)
+            return list(buffer)[-limit:]
+
+    def _is_streamed(self, key) -> bool:
+        """True si un stream WebSocket mantiene la serie al día (sin huecos ni retraso)."""
+        received_at = self._streamed.get(key)
+        return received_at is not None and time.time() - received_at <= config.WS_STALE_SECONDS
+
+    def ingest(self, symbol: str, timeframe: str, candle: list):
+        """
+        Inserta una vela recibida por streaming. Solo se aplica sobre series ya sembradas
+        por REST; si la vela no es contigua, se descarta y la serie vuelve al modo REST
+        para que la siguiente lectura rellene el hueco.
+        """
+        key = (symbol, timeframe)
+        with self._key_lock(key):
+            buffer = self._buffers.get(key)
+            if not buffer: return
+            if candle[0] > buffer[-1][0] + timeframe_to_ms(timeframe):
+                self._streamed.pop(key, None)
+                return
+            self._merge(buffer, [candle])
+            self._streamed[key] = time.time()
+
+    def clear(self, symbol: str = None):
+        """Vacía la caché completa o solo la de un símbolo."""
+        with self._lock:
+            for key in list(self._buffers):
+                if symbol is None or key[0] == symbol:
+                    del self._buffers[key]
+                    self._streamed.pop(key, None)
+
+# Instancia compartida por todo el sistema (Fase 2, IA en vivo y monitores)
+candle_cache = CandleCache(exchange)
+
+def fetch_ohlcv_cached(symbol: str, timeframe: str, limit: int = 100) -> list:
+    """Atajo a la caché compartida con la misma firma que `exchange.fetch_ohlcv`."""
+    return candle_cache.get_ohlcv(symbol, timeframe, limit=limit)
@@ -5,10 +5,41 @@ REFRESH_SECONDS = 150
 MIN_24H_VOLUME_USD = 5_000_000 # <-- Esta es la variable del error
 TIMEFRAME_ANALYSIS = '5m'
 WATCHLIST_SIZE = 10 # <-- El Top 10 de sospechosos
+SCAN_ASYNC = True # Escaneo de la Fase 1 en paralelo (ccxt.async_support)
+SCAN_CONCURRENCY = 25 # Máximo de peticiones simultáneas durante el escaneo
+TICKER_SNAPSHOT_TTL = 30 # Segundos que se reutiliza la foto completa de tickers
+COALESCE_TTL_SECONDS = 10 # Ventana en la que peticiones idénticas al exchange comparten resultado
+EXCHANGE_WEIGHT_PER_MINUTE = 2000 # Presupuesto de peso por minuto (Binance Futuros permite 2400)
+
+# --- Ingesta de Velas por WebSocket (opcional) ---
+USE_WS_KLINES = False # True: el ciclo lo dispara el cierre de cada vela de 5m en lugar del polling
+WS_KLINES_URL = "wss://fstream.binance.com"
+WS_STREAMS_PER_CONNECTION = 200
+WS_STALE_SECONDS = 10 # Si el stream lleva más tiempo sin datos, se vuelve a REST
+WS_SETTLE_SECONDS = 0.5 # Margen tras un cierre para recibir el resto de símbolos
+WS_RECONNECT_SECONDS = 5
+
+# --- Derivación de Timeframes ---
+# Timeframes que se construyen agregando velas de otro menor en lugar de descargarlos
+DERIVED_TIMEFRAMES = {'4h': '1h', '1d': '1h', '1w': '1d'}
+MAX_DERIVATION_SOURCE_LIMIT = 1000 # Por encima, la petición de klines pasa a pesar 10 y sale más caro pedir el timeframe nativo
+
+# --- Histórico en Disco ---
+HISTORICO_PATH = "Backtest/data/historico" # CSV antiguos: <timeframe>/<SÍMBOLO>.csv
+OHLCV_STORE_PATH = "Backtest/data/ohlcv" # Almacén columnar: <SÍMBOLO>/<timeframe>/<AAAA-MM>.npy
+HISTORY_START = "2020-01-01" # Desde dónde se descarga el histórico de un símbolo nuevo
+HISTORY_TIMEFRAMES = ['1w', '1d', '4h', '1h', '5m']
+DOWNLOAD_WORKERS = 8 # Descargas (símbolo, timeframe) en paralelo
+DOWNLOAD_PAGE_LIMIT = 1000 # Velas por página: 1000 cuestan peso 5, 1500 cuestan 10
+DOWNLOAD_ERRORS_LOG = "errores_descarga.txt"
+DATASET_CACHE_DIR = ".cache/datasets" # Copias binarias tipadas de los datasets CSV
+FEATURE_STORE_PATH = ".cache/features" # Features calculadas: <SÍMBOLO>/<timeframe>/<grupo>.npz
+FEATURE_WARMUP_BARS = 500 # Velas previas que se recalculan al extender unas features guardadas
 
 # --- Parámetros de Análisis Profundo (FASE 2) ---
 REVERSAL_TIMEFRAME = '15m'
 OHLCV_LIMIT = 100
+CANDLE_CACHE_SIZE = 500 # Velas máximas guardadas en memoria por (símbolo, timeframe)
 ACCEL_LOOKBACK_CANDLES = 3
 ACCEL_VOLUME_MULT = 2.0
 ACCEL_CHANGE_PCT = 1.5
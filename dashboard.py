@@ -11,6 +11,9 @@ import operations_manager
 import report_generator
 import joblib
 from io import BytesIO
+from ticker_snapshot import TickerSnapshot
+from request_scheduler import RequestScheduler, ScheduledExchange, LANE_DASHBOARD
+from indicators import rsi, pct_change, distance_from_ma, volume_spike
 
 
 # --- FUNCIÓN DE EXCEL ---
@@ -32,7 +35,12 @@ st.set_page_config(
 @st.cache_resource
 def init_exchange():
     try:
-        exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
+        # Carril de menor prioridad; el planificador se sincroniza con el peso que reporta
+        # Binance, así que también respeta lo que está gastando el bot.
+        exchange = ScheduledExchange(
+            ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}}),
+            RequestScheduler(), default_lane=LANE_DASHBOARD
+        )
         st.sidebar.success("Conectado a Binance para precios en vivo.")
         return exchange
     except Exception as e:
@@ -40,6 +48,12 @@ def init_exchange():
         return None
 exchange = init_exchange()
 
+# Foto de tickers compartida por todas las pestañas y reruns (una descarga por intervalo)
+@st.cache_resource
+def init_ticker_snapshot():
+    return TickerSnapshot(exchange) if exchange else None
+ticker_snapshot = init_ticker_snapshot()
+
 # Pega este bloque después de la función init_exchange
 @st.cache_resource
 def load_models():
@@ -89,13 +103,12 @@ def get_live_features(symbol):
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms'); df.set_index('timestamp', inplace=True); data[tf] = df
         
         df = data['1h'].copy()
-        df['change_24h'] = df['close'].pct_change(periods=24); df['change_1h'] = df['close'].pct_change(periods=1)
-        ma_24h = df['close'].rolling(24).mean(); df['distance_from_ma_24h'] = (df['close'] - ma_24h) / ma_24h
+        close = df['close'].to_numpy()
+        df['change_24h'] = pct_change(close, 24); df['change_1h'] = pct_change(close, 1)
+        df['distance_from_ma_24h'] = distance_from_ma(close, 24)
         for tf_context in ['4h', '1d']:
-            delta = data[tf_context]['close'].diff(1); gain = delta.where(delta > 0, 0); loss = -delta.where(delta < 0, 0)
-            avg_gain = gain.rolling(window=14).mean(); avg_loss = loss.rolling(window=14).mean(); rs = avg_gain / avg_loss
-            data[tf_context][f'rsi_{tf_context}'] = 100 - (100 / (1 + rs))
-        data['5m']['volume_spike_5m'] = data['5m']['volume'] / data['5m']['volume'].rolling(window=12).mean()
+            data[tf_context][f'rsi_{tf_context}'] = rsi(data[tf_context]['close'].to_numpy(), length=14)
+        data['5m']['volume_spike_5m'] = volume_spike(data['5m']['volume'].to_numpy(), 12)
         df = pd.merge_asof(df.sort_index(), data['4h'][['rsi_4h']].sort_index(), on='timestamp', direction='backward')
         df = pd.merge_asof(df.sort_index(), data['1d'][['rsi_1d']].sort_index(), on='timestamp', direction='backward')
         df = pd.merge_asof(df.sort_index(), data['5m'][['volume_spike_5m']].sort_index(), on='timestamp', direction='backward')
@@ -108,10 +121,7 @@ def get_live_features(symbol):
 def run_hunter_analysis():
     """Realiza el análisis completo del cazador y devuelve un DataFrame."""
     with st.spinner("Analizando el mercado... Esto puede tardar 1-2 minutos."):
-        top_gainers = sorted(
-            [t for t in exchange.fetch_tickers().values() if t['symbol'].endswith('/USDT:USDT') and t.get('percentage')],
-            key=lambda t: t['percentage'], reverse=True
-        )
+        top_gainers = ticker_snapshot.top_gainers()
         
         candidates = []
         for ticker in top_gainers[:25]:
@@ -150,7 +160,8 @@ def display_live_trades_section(df_live, title, is_virtual=False):
             # --- FASE 1: CÁLCULO DE DATOS EN VIVO ---
             live_pnl_list, live_duration_list = [], []
             symbols_in_file = df_live['symbol'].unique().tolist()
-            tickers = exchange.fetch_tickers(symbols_in_file)
+            tickers = ticker_snapshot.get_many(symbols_in_file)
+            st.caption(f"Precios en vivo de hace {ticker_snapshot.age():.0f} s.")
             now_utc = datetime.now(timezone.utc)
 
             for index, trade in df_live.iterrows():
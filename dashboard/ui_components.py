@@ -14,17 +14,28 @@ import ccxt
 from datetime import datetime, timezone
 import trade_manager
 import data_manager
+from ticker_snapshot import TickerSnapshot
+from request_scheduler import RequestScheduler, ScheduledExchange, LANE_DASHBOARD
 
 # Mantenemos una conexión a ccxt para los precios en vivo
 @st.cache_resource
 def init_exchange():
     try:
-        return ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
+        return ScheduledExchange(
+            ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}}),
+            RequestScheduler(), default_lane=LANE_DASHBOARD
+        )
     except Exception as e:
         st.sidebar.error(f"Error conectando a Binance: {e}")
         return None
 exchange = init_exchange()
 
+# Foto de tickers compartida entre reruns (una descarga por intervalo)
+@st.cache_resource
+def init_ticker_snapshot():
+    return TickerSnapshot(exchange) if exchange else None
+ticker_snapshot = init_ticker_snapshot()
+
 # REEMPLAZA LA FUNCIÓN display_alerts_tab ENTERA EN ui_components.py
 
 def display_alerts_tab(df_alertas):
@@ -113,7 +124,8 @@ def display_open_tab(df_abiertas):
 
     try:
         symbols_in_file = df_abiertas['symbol'].unique().tolist()
-        tickers = exchange.fetch_tickers(symbols_in_file)
+        tickers = ticker_snapshot.get_many(symbols_in_file)
+        st.caption(f"Precios en vivo de hace {ticker_snapshot.age():.0f} s.")
         now_utc = datetime.now(timezone.utc)
 
         # Encabezados de la tabla
@@ -0,0 +1,95 @@
+# /dataset_cache.py
+
+import os
+import sys
+import hashlib
+import numpy as np
+import pandas as pd
+import config
+
+# Columnas que, si vienen como texto, se guardan como fechas
+DATETIME_COLUMNS = ('timestamp', 'timestamp_dt', 'fecha', 'date')
+
+def sniff_csv_format(path: str) -> dict:
+    """
+    Detecta el formato del CSV a partir de la cabecera: separador `;` con coma
+    decimal (export de Excel en español) o `,` con punto decimal. El BOM se ignora.
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        header = f.readline()
+    if header.count(';') > header.count(','):
+        return {'sep': ';', 'decimal': ','}
+    return {'sep': ',', 'decimal': '.'}
+
+def read_source_csv(path: str) -> pd.DataFrame:
+    """Lectura lenta del CSV original, con los tipos que se guardan en caché."""
+    df = pd.read_csv(path, encoding='utf-8-sig', **sniff_csv_format(path))
+    for col in df.columns:
+        if col.lower() in DATETIME_COLUMNS and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+def cache_path(path: str, cache_dir: str = config.DATASET_CACHE_DIR) -> str:
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}_{key}.npz")
+
+def _encode(df: pd.DataFrame) -> dict:
+    """DataFrame -> arrays tipados: float32 para decimales, int64 para enteros, fechas y texto tal cual."""
+    arrays = {}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+            values = series.to_numpy(dtype='i8')
+        elif pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype='f4')
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            if series.dt.tz is not None:
+                series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+            values = series.to_numpy().astype('datetime64[ms]')
+        else:
+            values = series.fillna('').astype(str).to_numpy(dtype='U')
+        arrays[f"c{i}"] = values
+    arrays['__columns'] = np.array(df.columns, dtype='U')
+    return arrays
+
+def _decode(data) -> pd.DataFrame:
+    columns = data['__columns']
+    return pd.DataFrame({col: data[f"c{i}"] for i, col in enumerate(columns)})
+
+def load_dataset(path: str, cache_dir: str = config.DATASET_CACHE_DIR) -> pd.DataFrame:
+    """
+    Carga un dataset CSV a través de una caché binaria (.npz). La primera carga parsea el
+    CSV y guarda sus columnas tipadas; las siguientes leen la caché directamente. La caché
+    se reconstruye sola si cambian la fecha de modificación o el tamaño del CSV.
+    Lanza FileNotFoundError si el CSV no existe, igual que `pd.read_csv`.
+    """
+    stat = os.stat(path)
+    signature = np.array([stat.st_mtime_ns, stat.st_size], dtype='i8')
+    cached = cache_path(path, cache_dir)
+
+    if os.path.exists(cached):
+        try:
+            with np.load(cached, allow_pickle=False) as data:
+                if np.array_equal(data['__source'], signature):
+                    return _decode(data)
+        except Exception as e:
+            print(f"⚠️ Caché de '{path}' ilegible ({e}). Se reconstruye.")
+
+    df = read_source_csv(path)
+    arrays = _encode(df)
+    arrays['__source'] = signature
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cached + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, cached)
+
+    with np.load(cached, allow_pickle=False) as data:
+        return _decode(data)
+
+if __name__ == "__main__":
+    # Uso: python dataset_cache.py ARCHIVO.csv [...]  -> precalienta la caché
+    for source in sys.argv[1:]:
+        df = load_dataset(source)
+        print(f"✅ {source}: {len(df)} filas, {len(df.columns)} columnas en caché.")
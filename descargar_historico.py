@@ -0,0 +1,97 @@
+# /descargar_historico.py
+
+import sys
+import time
+import ccxt
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+import config
+from utils import scheduler, timeframe_to_ms
+from request_scheduler import ScheduledExchange, LANE_BACKFILL
+from ohlcv_store import ohlcv_store, store_symbol
+
+def market_symbol(symbol: str) -> str:
+    """'BTCUSDT' o 'BTC/USDT' -> 'BTC/USDT:USDT' (perpetuo USDT en ccxt)."""
+    if ':' in symbol: return symbol
+    if '/' not in symbol and symbol.endswith('USDT'):
+        symbol = f"{symbol[:-4]}/USDT"
+    return f"{symbol}:USDT"
+
+def create_backfill_exchange():
+    """Cliente de Binance Futuros que comparte el planificador de peso en el carril de menor prioridad."""
+    client = ccxt.binance({'enableRateLimit': False, 'options': {'defaultType': 'future'}})
+    return ScheduledExchange(client, scheduler, default_lane=LANE_BACKFILL)
+
+class HistoricalDownloader:
+    """
+    Descarga paginada de velas históricas hacia el almacén OHLCV. El propio almacén hace
+    de checkpoint: cada página se guarda en cuanto llega y una nueva ejecución continúa
+    desde la última vela guardada de cada (símbolo, timeframe), así que solo se pide la
+    cola que falta. Solo se guardan velas cerradas.
+    """
+
+    def __init__(self, client=None, store=ohlcv_store, page_limit: int = config.DOWNLOAD_PAGE_LIMIT,
+                 start: str = config.HISTORY_START, errors_log: str = config.DOWNLOAD_ERRORS_LOG):
+        self.client = client or create_backfill_exchange()
+        self.store = store
+        self.page_limit = page_limit
+        self.start_ms = int(pd.Timestamp(start, tz='UTC').value // 1_000_000)
+        self.errors_log = errors_log
+
+    def download(self, symbol: str, timeframe: str, now_ms: int = None) -> int:
+        """Descarga la cola pendiente de un (símbolo, timeframe). Devuelve las velas añadidas."""
+        tf_ms = timeframe_to_ms(timeframe)
+        now_ms = now_ms or int(time.time() * 1000)
+        last = self.store.last_timestamp(symbol, timeframe)
+        since = last + tf_ms if last is not None else self.start_ms
+        market = market_symbol(symbol)
+
+        added = 0
+        while since + tf_ms <= now_ms:
+            page = self.client.fetch_ohlcv(market, timeframe, since=since, limit=self.page_limit)
+            closed = [c for c in page if c[0] >= since and c[0] + tf_ms <= now_ms]
+            if not closed: break
+            added += self.store.append(symbol, timeframe, closed)
+            since = closed[-1][0] + tf_ms
+            # Página incompleta o con la vela abierta: ya estamos al día
+            if len(page) < self.page_limit or len(closed) < len(page): break
+        return added
+
+    def log_error(self, symbol: str, timeframe: str, error):
+        with open(self.errors_log, 'a', encoding='utf-8') as f:
+            f.write(f"{datetime.now(timezone.utc)} - {symbol} [{timeframe}] - {error}\n")
+
+    def run(self, symbols: list, timeframes: list = config.HISTORY_TIMEFRAMES,
+            workers: int = config.DOWNLOAD_WORKERS) -> dict:
+        """Descarga todas las combinaciones (símbolo, timeframe) en paralelo."""
+        jobs = [(store_symbol(s), tf) for s in symbols for tf in timeframes]
+        summary = {'jobs': len(jobs), 'candles': 0, 'errors': 0}
+        print(f"📥 Descargando histórico: {len(symbols)} símbolos x {len(timeframes)} timeframes con {workers} hilos...")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.download, symbol, tf): (symbol, tf) for symbol, tf in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                symbol, tf = futures[future]
+                try:
+                    added = future.result()
+                    summary['candles'] += added
+                    if added: print(f"  [{done}/{len(jobs)}] {symbol} [{tf}]: +{added} velas")
+                except Exception as e:
+                    summary['errors'] += 1
+                    self.log_error(symbol, tf, e)
+                    print(f"  [{done}/{len(jobs)}] ❌ {symbol} [{tf}]: {e}")
+        return summary
+
+if __name__ == "__main__":
+    # Uso: python descargar_historico.py [SÍMBOLO ...]  (sin argumentos: universo líquido actual)
+    symbols = sys.argv[1:]
+    if not symbols:
+        from ticker_snapshot import ticker_snapshot
+        symbols = ticker_snapshot.liquid_usdt_perps()
+
+    start = time.monotonic()
+    result = HistoricalDownloader().run(symbols)
+    print(f"\n✅ Descarga completada en {time.monotonic() - start:.1f}s: {result['candles']} velas nuevas, "
+          f"{result['errors']} errores (ver {config.DOWNLOAD_ERRORS_LOG}).")
+    print(f"Peticiones al exchange -> {scheduler.report()}")
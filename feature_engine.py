@@ -1,10 +1,10 @@
 # feature_engine.py (Versión con Escaneo Avanzado de Momentum)
 
-import ccxt
 import pandas as pd
 import numpy as np
-
-exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
+from candle_cache import fetch_ohlcv_cached
+from timeframe_derivation import fetch_multi_timeframe
+from indicators import rsi, pct_change, distance_from_ma, volume_spike
 
 # LISTA DE MONEDAS A MONITOREAR (puedes ampliarla)
 SYMBOLS_TO_SCAN = [
@@ -21,8 +21,9 @@ def get_live_features(symbol):
         data = {}
         # Usamos 1w también como pediste para un análisis más completo
         timeframes = {'1w': 50, '1d': 26, '4h': 26, '1h': 26, '5m': 13}
+        ohlcv_by_tf = fetch_multi_timeframe(symbol, {tf: 50 for tf in timeframes})
         for tf, min_candles in timeframes.items():
-            ohlcv = exchange.fetch_ohlcv(symbol, tf, limit=50)
+            ohlcv = ohlcv_by_tf[tf]
             if len(ohlcv) < min_candles:
                 return None, None
             df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -33,23 +34,15 @@ def get_live_features(symbol):
         df = data['1h'].copy()
         precio_actual = df['close'].iloc[-1]
         
-        df['change_24h'] = df['close'].pct_change(periods=24)
-        df['change_1h'] = df['close'].pct_change(periods=1)
-        ma_24h = df['close'].rolling(24).mean()
-        df['distance_from_ma_24h'] = (df['close'] - ma_24h) / ma_24h
+        close = df['close'].to_numpy()
+        df['change_24h'] = pct_change(close, 24)
+        df['change_1h'] = pct_change(close, 1)
+        df['distance_from_ma_24h'] = distance_from_ma(close, 24)
         
-        # --- BLOQUE CORREGIDO ---
-        # Las siguientes líneas ahora están correctamente indentadas dentro del bucle 'for'
         for tf_context in ['4h', '1d', '1w']:
-            delta = data[tf_context]['close'].diff(1)
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            avg_gain = gain.rolling(window=14).mean()
-            avg_loss = loss.rolling(window=14).mean()
-            rs = avg_gain / avg_loss
-            data[tf_context][f'rsi_{tf_context}'] = 100 - (100 / (1 + rs))
+            data[tf_context][f'rsi_{tf_context}'] = rsi(data[tf_context]['close'].to_numpy(), length=14)
         
-        data['5m']['volume_spike_5m'] = data['5m']['volume'] / data['5m']['volume'].rolling(window=12).mean()
+        data['5m']['volume_spike_5m'] = volume_spike(data['5m']['volume'].to_numpy(), 12)
         
         df = pd.merge_asof(df.sort_index(), data['4h'][['rsi_4h']].sort_index(), on='timestamp', direction='backward')
         df = pd.merge_asof(df.sort_index(), data['1d'][['rsi_1d']].sort_index(), on='timestamp', direction='backward')
@@ -77,7 +70,7 @@ def advanced_market_scan():
     for symbol in SYMBOLS_TO_SCAN:
         try:
             # Descargamos solo las últimas velas de 1h necesarias para el cálculo
-            ohlcv = exchange.fetch_ohlcv(symbol, '1h', limit=MOMENTUM_PERIOD + 2)
+            ohlcv = fetch_ohlcv_cached(symbol, '1h', limit=MOMENTUM_PERIOD + 2)
             if len(ohlcv) < MOMENTUM_PERIOD + 1:
                 continue
             
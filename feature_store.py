@@ -0,0 +1,160 @@
+# /feature_store.py
+
+import os
+import sys
+import inspect
+import hashlib
+import numpy as np
+import pandas as pd
+import config
+from ohlcv_store import store_symbol
+
+_PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def _source(obj) -> str:
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return getattr(obj, '__qualname__', repr(obj))
+
+def _is_project_module(module) -> bool:
+    path = getattr(module, '__file__', None)
+    return bool(path) and os.path.abspath(path).startswith(_PROJECT_ROOT + os.sep) and 'site-packages' not in path
+
+def _global_names(code) -> set:
+    # Nombres globales del código y de sus lambdas/comprehensions internas
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+def _dependencies(compute) -> list:
+    """
+    Código del proyecto del que depende `compute`, en orden estable: las funciones del
+    mismo módulo que llama (recursivamente) y los módulos del proyecto de los que usa
+    funciones o que usa directamente. Las librerías externas no cuentan.
+    """
+    home = getattr(compute, '__module__', None)
+    functions, modules = {}, {}
+    pending = [compute]
+    while pending:
+        func = pending.pop()
+        code, namespace = getattr(func, '__code__', None), getattr(func, '__globals__', None)
+        if code is None or namespace is None: continue
+        for name in sorted(_global_names(code)):
+            obj = namespace.get(name)
+            module = obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, '__module__', None) or '')
+            if module is None or not _is_project_module(module): continue
+            if inspect.isfunction(obj) and obj.__module__ == home:
+                if obj is not compute and obj.__qualname__ not in functions:
+                    functions[obj.__qualname__] = obj
+                    pending.append(obj)
+            elif module.__name__ != home:
+                modules[module.__name__] = module
+    return [functions[k] for k in sorted(functions)] + [modules[k] for k in sorted(modules)]
+
+class FeatureSet:
+    """
+    Definición de un grupo de features: `compute(candles)` recibe las velas (DataFrame con
+    índice temporal) y devuelve {columna: valores} alineados con ellas. El hash de la
+    definición sale del código de `compute` y de lo que usa del proyecto (sus funciones
+    auxiliares y el código entero de los módulos de los que toma kernels, p. ej.
+    `indicators`), los parámetros y `version`. `version` solo hace falta si cambia algo
+    que no es código del proyecto (una librería externa, datos leídos de disco...).
+
+    `warmup` son las velas previas que se recalculan para extender la serie: tiene que
+    cubrir la ventana más larga de los indicadores (las medias exponenciales tienen memoria
+    infinita, pero con 500 velas el peso de lo que queda fuera es despreciable). Las
+    features que dependen de toda la historia (p. ej. un máximo acumulado) no van aquí.
+    """
+
+    def __init__(self, name: str, compute, params: dict = None, warmup: int = config.FEATURE_WARMUP_BARS,
+                 version: int = 1):
+        self.name = name
+        self.compute = compute
+        self.params = params or {}
+        self.warmup = warmup
+        self.version = version
+        sources = [_source(compute)] + [_source(dep) for dep in _dependencies(compute)]
+        definition = f"{'|'.join(sources)}|{sorted(self.params.items())!r}|{warmup}|{version}"
+        self.digest = hashlib.blake2b(definition.encode('utf-8'), digest_size=8).hexdigest()
+
+    def __call__(self, candles: pd.DataFrame) -> dict:
+        values = self.compute(candles, **self.params)
+        return {col: np.asarray(v, dtype=np.float64) for col, v in values.items()}
+
+def _timestamps(index) -> np.ndarray:
+    return np.asarray(index).astype('datetime64[ms]').astype('int64')
+
+class FeatureStore:
+    """
+    Features ya calculadas en disco, una entrada por (símbolo, timeframe, grupo) en
+    `<root>/<SÍMBOLO>/<timeframe>/<grupo>.npz` con el hash de la definición y la última
+    vela cubierta. Cada carga solo calcula las velas posteriores a esa última vela (más el
+    calentamiento); si cambia la definición o el histórico ya no empieza igual, se
+    recalcula todo.
+    """
+
+    def __init__(self, root: str = config.FEATURE_STORE_PATH):
+        self.root = root
+
+    def _path(self, symbol: str, timeframe: str, name: str) -> str:
+        return os.path.join(self.root, store_symbol(symbol), timeframe, f"{name}.npz")
+
+    def _load(self, path: str, digest: str):
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['__digest']) != digest:
+                    return None
+                columns = list(data['__columns'])
+                return data['__timestamp'], {col: data[f"c{i}"] for i, col in enumerate(columns)}
+        except Exception as e:
+            print(f"⚠️ Features de '{path}' ilegibles ({e}). Se recalculan.")
+            return None
+
+    def _save(self, path: str, digest: str, timestamps: np.ndarray, columns: dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {f"c{i}": values for i, values in enumerate(columns.values())}
+        arrays['__columns'] = np.array(list(columns), dtype='U')
+        arrays['__timestamp'] = timestamps
+        arrays['__digest'] = np.array(digest)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def features(self, symbol: str, timeframe: str, candles: pd.DataFrame, feature_set: FeatureSet) -> pd.DataFrame:
+        """Features de `feature_set` para `candles` (ordenadas), con el mismo índice."""
+        candles = candles.sort_index()
+        timestamps = _timestamps(candles.index)
+        path = self._path(symbol, timeframe, feature_set.name)
+        stored = self._load(path, feature_set.digest)
+
+        if stored is not None:
+            stored_ts, stored_columns = stored
+            start = len(stored_ts)
+            # La parte guardada sirve si el histórico tiene las mismas velas hasta su última vela
+            if not (0 < start <= len(timestamps) and timestamps[0] == stored_ts[0]
+                    and timestamps[start - 1] == stored_ts[-1]):
+                stored = None
+
+        if stored is None:
+            result = feature_set(candles)
+            self._save(path, feature_set.digest, timestamps, result)
+        elif start < len(timestamps):
+            # Solo la cola: las velas nuevas más el calentamiento previo
+            from_row = max(start - feature_set.warmup, 0)
+            tail = feature_set(candles.iloc[from_row:])
+            offset = start - from_row
+            result = {col: np.concatenate([stored_columns[col], values[offset:]]) for col, values in tail.items()}
+            self._save(path, feature_set.digest, timestamps, result)
+        else:
+            result = stored_columns
+
+        return pd.DataFrame(result, index=candles.index)
+
+# Instancia única, igual que `ohlcv_store`
+feature_store = FeatureStore()
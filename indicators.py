@@ -0,0 +1,98 @@
+# /indicators.py
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+# Todas las funciones trabajan sobre arrays de NumPy a lo largo del último eje, así que
+# aceptan una serie (T,) o una matriz (símbolos, T) y devuelven la misma forma.
+# Los valores de calentamiento se devuelven como NaN, igual que en pandas.
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+def shift(x, periods: int = 1) -> np.ndarray:
+    """Desplaza hacia delante a lo largo del tiempo rellenando con NaN (como `Series.shift`)."""
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if periods < x.shape[-1]:
+        out[..., periods:] = x[..., :x.shape[-1] - periods]
+    return out
+
+def _decay_filter(x: np.ndarray, decay: float) -> np.ndarray:
+    """y[t] = x[t] + decay * y[t-1] a lo largo del último eje."""
+    if lfilter is not None:
+        return lfilter([1.0], [1.0, -decay], x, axis=-1)
+    out = np.empty_like(x)
+    acc = np.zeros(x.shape[:-1])
+    for t in range(x.shape[-1]):
+        acc = x[..., t] + decay * acc
+        out[..., t] = acc
+    return out
+
+def ewm_mean(x, com: float = None, span: float = None, alpha: float = None, min_periods: int = 0) -> np.ndarray:
+    """
+    Media exponencial equivalente a `Series.ewm(..., adjust=True).mean()`. Los NaN no
+    aportan peso pero sí envejecen las observaciones anteriores (ignore_na=False).
+    """
+    if alpha is None:
+        alpha = 1.0 / (1.0 + com) if com is not None else 2.0 / (span + 1.0)
+    x = _as_float(x)
+    valid = ~np.isnan(x)
+    decay = 1.0 - alpha
+    numerator = _decay_filter(np.where(valid, x, 0.0), decay)
+    denominator = _decay_filter(valid.astype(np.float64), decay)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = numerator / denominator
+    out[np.cumsum(valid, axis=-1) < max(min_periods, 1)] = np.nan
+    return out
+
+def rolling_mean(x, window: int) -> np.ndarray:
+    """Media móvil simple de `window` velas (NaN hasta completar la ventana)."""
+    x = _as_float(x)
+    out = np.full_like(x, np.nan)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).mean(axis=-1)
+    return out
+
+def pct_change(x, periods: int = 1) -> np.ndarray:
+    """Variación relativa respecto a `periods` velas atrás."""
+    x = _as_float(x)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return x / shift(x, periods) - 1
+
+def rsi(close, length: int = 14) -> np.ndarray:
+    """RSI de Wilder (medias exponenciales con alpha = 1/length), el mismo que usa el entrenamiento."""
+    delta = np.diff(_as_float(close), axis=-1, prepend=np.nan)
+    # Como en pandas, la primera diferencia (NaN) cuenta como 0 en ganancias y pérdidas
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = ewm_mean(gain, com=length - 1, min_periods=length)
+    avg_loss = ewm_mean(loss, com=length - 1, min_periods=length)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low = _as_float(high), _as_float(low)
+    prev_close = shift(close, 1)
+    # fmax ignora los NaN: la primera vela usa solo high - low
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+def atr(high, low, close, length: int = 14) -> np.ndarray:
+    """ATR de Wilder."""
+    return ewm_mean(true_range(high, low, close), com=length - 1, min_periods=length)
+
+def distance_from_ma(close, window: int = 24) -> np.ndarray:
+    """Distancia del precio a su media móvil, relativa al precio: (close - MA) / close."""
+    close = _as_float(close)
+    return (close - rolling_mean(close, window)) / close
+
+def volume_spike(volume, window: int = 12) -> np.ndarray:
+    """Volumen de la vela frente a la media de las últimas `window` velas (incluida)."""
+    volume = _as_float(volume)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return volume / rolling_mean(volume, window)
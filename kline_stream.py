@@ -0,0 +1,111 @@
+# /kline_stream.py
+
+import asyncio
+import json
+import config
+from utils import timeframe_to_ms
+from candle_cache import candle_cache
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+def symbol_to_stream_id(symbol: str) -> str:
+    """'BTC/USDT:USDT' -> 'btcusdt' (id de mercado que usan los streams de Binance)."""
+    return symbol.split(':')[0].replace('/', '').lower()
+
+class KlineStream:
+    """
+    Ingesta de velas por WebSocket (streams `<symbol>@kline_<tf>` de Binance Futuros).
+    Cada actualización se vuelca en la caché de velas compartida, de modo que las fases
+    de análisis leen datos al día sin hacer polling REST, y cada cierre de vela despierta
+    al bucle principal a través de `wait_for_close`.
+    """
+
+    def __init__(self, symbols: list, timeframe: str = config.TIMEFRAME_ANALYSIS,
+                 url: str = config.WS_KLINES_URL, cache=candle_cache,
+                 streams_per_connection: int = config.WS_STREAMS_PER_CONNECTION):
+        self.timeframe = timeframe
+        self.url = url.rstrip('/')
+        self.cache = cache
+        self.streams_per_connection = streams_per_connection
+        self.symbols_by_id = {symbol_to_stream_id(s): s for s in symbols}
+        self.last_closed = {}  # símbolo -> última vela cerrada recibida
+        self.last_close_ts = None
+        self._close_event = asyncio.Event()
+        self._tasks = []
+
+    def _connection_urls(self) -> list:
+        streams = [f"{stream_id}@kline_{self.timeframe}" for stream_id in self.symbols_by_id]
+        chunks = [streams[i:i + self.streams_per_connection] for i in range(0, len(streams), self.streams_per_connection)]
+        return [f"{self.url}/stream?streams={'/'.join(chunk)}" for chunk in chunks]
+
+    def handle_message(self, raw: str):
+        """Procesa un mensaje del stream combinado y actualiza la caché."""
+        message = json.loads(raw)
+        kline = message.get('data', message).get('k')
+        if not kline: return
+
+        symbol = self.symbols_by_id.get(kline['s'].lower())
+        if symbol is None: return
+
+        candle = [kline['t'], float(kline['o']), float(kline['h']), float(kline['l']), float(kline['c']), float(kline['v'])]
+        self.cache.ingest(symbol, self.timeframe, candle)
+
+        if kline['x']:
+            self.last_closed[symbol] = candle
+        elif self.last_close_ts is None or candle[0] > self.last_close_ts:
+            # Primera actualización de una vela nueva: la anterior ya está cerrada
+            # para todo el universo y la caché termina en la vela en formación.
+            previous = candle[0] - timeframe_to_ms(self.timeframe)
+            if self.last_closed.get(symbol, [None])[0] == previous:
+                self.last_close_ts = candle[0]
+                self._close_event.set()
+
+    async def _listen(self, url: str):
+        """Mantiene una conexión viva, reconectando ante cualquier caída."""
+        while True:
+            try:
+                # Binance envía los pings; desactivamos los del cliente para que una fase
+                # síncrona larga no provoque un timeout local.
+                async with websockets.connect(url, ping_interval=None, max_size=None) as ws:
+                    async for raw in ws:
+                        self.handle_message(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Stream de velas desconectado ({e}). Reconectando en {config.WS_RECONNECT_SECONDS}s...")
+                await asyncio.sleep(config.WS_RECONNECT_SECONDS)
+
+    def start(self):
+        """Lanza una tarea de escucha por cada conexión necesaria."""
+        if websockets is None:
+            raise RuntimeError("El modo WebSocket requiere el paquete 'websockets' (pip install websockets).")
+        self._tasks = [asyncio.create_task(self._listen(url)) for url in self._connection_urls()]
+        print(f"📡 Stream de velas {self.timeframe} iniciado para {len(self.symbols_by_id)} activos ({len(self._tasks)} conexiones).")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait_for_close(self, timeout: float = None) -> bool:
+        """
+        Espera al siguiente cierre de vela (más un breve margen para que lleguen los
+        mensajes del resto de símbolos). Devuelve False si se agota el tiempo.
+        """
+        try:
+            await asyncio.wait_for(self._close_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._close_event.clear()
+        await asyncio.sleep(config.WS_SETTLE_SECONDS)
+        return True
+
+    def closed_candles(self) -> dict:
+        """Últimas velas cerradas del cierre más reciente, por símbolo."""
+        if self.last_close_ts is None: return {}
+        previous = self.last_close_ts - timeframe_to_ms(self.timeframe)
+        return {s: c for s, c in self.last_closed.items() if c[0] == previous}
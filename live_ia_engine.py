@@ -1,8 +1,14 @@
 # /live_ia_engine.py
 import pandas as pd
+import numpy as np
 import joblib
+import time
 import warnings
-from utils import exchange
+from concurrent.futures import ThreadPoolExecutor
+from timeframe_derivation import fetch_multi_timeframe
+from streaming_indicators import StreamingSeries, PctChange, DistanceFromMA, ATR, WilderRSI, VolumeSpike
+from asof_alignment import alignment, ROW_PADDING
+from utils import timeframe_to_ms, scheduler
 import config
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -16,21 +22,26 @@ except FileNotFoundError:
     print(f"❌ ERROR CRÍTICO: No se encontró '{MODEL_FILE}'.")
     model = None
 
-def calculate_rsi(series, length=14):
-    delta = series.diff(1)
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.ewm(com=length - 1, min_periods=length).mean()
-    avg_loss = loss.ewm(com=length - 1, min_periods=length).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-def fetch_live_data(symbol):
-    timeframes = ['1w', '1d', '4h', '1h', '5m']
+LIVE_TIMEFRAMES = ['1w', '1d', '4h', '1h', '5m']
+LIVE_SEED_CANDLES = 200  # Velas con las que se siembra un estado incremental nuevo
+
+def _live_limit(symbol, tf):
+    """
+    Velas que necesita el estado de (símbolo, tf): la ventana de siembra si aún no existe
+    o se quedó demasiado atrás; si no, solo desde su última vela cerrada (el enlace) hasta
+    la vela en formación. Con colas cortas los timeframes altos se pueden derivar de 1h.
+    """
+    state = _live_states.get((symbol, tf))
+    if state is None or state.last_ts is None: return LIVE_SEED_CANDLES
+    missing = int((time.time() * 1000 - state.last_ts) // state.timeframe_ms) + 2
+    return min(missing, LIVE_SEED_CANDLES)
+
+def fetch_live_data(symbol, timeframes=LIVE_TIMEFRAMES):
     data = {}
     try:
+        ohlcv_by_tf = fetch_multi_timeframe(symbol, {tf: _live_limit(symbol, tf) for tf in timeframes})
         for tf in timeframes:
-            ohlcv = exchange.fetch_ohlcv(symbol, tf, limit=200)
+            ohlcv = ohlcv_by_tf[tf]
             if not ohlcv: return None
             df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
@@ -40,71 +51,132 @@ def fetch_live_data(symbol):
     except Exception:
         return None
 
-def create_live_features(altcoin_data, btc_data, eth_data):
-    df = altcoin_data['1h'].copy()
-    df['change_1h'] = df['close'].pct_change(periods=1)
-    df['change_4h'] = df['close'].pct_change(periods=4)
-    df['change_12h'] = df['close'].pct_change(periods=12)
-    df['change_24h'] = df['close'].pct_change(periods=24)
-    df['distance_from_ma_24h'] = (df['close'] - df['close'].rolling(24).mean()) / df['close']
-    for tf_context in ['1w', '1d', '4h']:
-        if tf_context in altcoin_data:
-            altcoin_data[tf_context][f'rsi_{tf_context}'] = calculate_rsi(altcoin_data[tf_context]['close'], length=14)
-    altcoin_data['5m']['volume_spike_5m'] = altcoin_data['5m']['volume'] / altcoin_data['5m']['volume'].rolling(window=12).mean()
-    df['btc_change_24h'] = btc_data['1h']['close'].pct_change(periods=24)
-    df['eth_change_24h'] = eth_data['1h']['close'].pct_change(periods=24)
-    for tf_context in ['1w', '1d', '4h']:
-        if tf_context in altcoin_data:
-            df = pd.merge_asof(df.sort_index(), altcoin_data[tf_context][[f'rsi_{tf_context}']].sort_index(), on='timestamp', direction='backward')
-    df = pd.merge_asof(df.sort_index(), altcoin_data['5m'][['volume_spike_5m']].sort_index(), on='timestamp', direction='backward')
-    return df.iloc[-1:]
-
-# REEMPLAZA LA FUNCIÓN get_ai_prediction ENTERA POR ESTA
-
-def get_ai_prediction(symbol, btc_data, eth_data):
+# --- ESTADO INCREMENTAL DE INDICADORES ---
+# Un StreamingSeries por (símbolo, timeframe): cada ciclo solo consume las velas que han
+# cerrado desde el anterior y la vela en formación se evalúa con `peek`.
+BTC_SYMBOL = 'BTC/USDT'
+ETH_SYMBOL = 'ETH/USDT'
+LIVE_INDICATORS = {
+    '1h': {
+        'change_1h': lambda: PctChange(1),
+        'change_4h': lambda: PctChange(4),
+        'change_12h': lambda: PctChange(12),
+        'change_24h': lambda: PctChange(24),
+        'distance_from_ma_24h': lambda: DistanceFromMA(24),
+        'atr': lambda: ATR(config.ATR_PERIOD),
+    },
+    '4h': {'rsi': lambda: WilderRSI(14)},
+    '1d': {'rsi': lambda: WilderRSI(14)},
+    '1w': {'rsi': lambda: WilderRSI(14)},
+    '5m': {'volume_spike': lambda: VolumeSpike(12)},
+}
+_live_states = {}
+
+def _advance_state(symbol, tf, df):
+    """
+    Avanza el estado de (símbolo, tf) con las velas cerradas nuevas del DataFrame (todas
+    menos la última, que sigue abierta) y devuelve (estado, vela en formación).
+    """
+    state = _live_states.get((symbol, tf))
+    if state is None:
+        state = _live_states[(symbol, tf)] = StreamingSeries(LIVE_INDICATORS[tf], timeframe_to_ms(tf))
+
+    timestamps = df.index.values.astype('datetime64[ms]').astype('int64')
+    start = 0
+    if state.last_ts is not None:
+        pos = int(np.searchsorted(timestamps, state.last_ts))
+        # Solo la cola si enlaza con lo ya consumido; si no, la ventana completa (el estado se resiembra)
+        if pos < len(timestamps) - 1 and timestamps[pos] == state.last_ts and \
+                (pos + 1 == len(timestamps) - 1 or timestamps[pos + 1] == state.last_ts + state.timeframe_ms):
+            start = pos + 1
+    values = df[['open', 'high', 'low', 'close', 'volume']].to_numpy()[start:]
+    candles = [[int(ts), *row] for ts, row in zip(timestamps[start:], values.tolist())]
+    state.advance(candles[:-1])
+    return state, candles[-1]
+
+# --- PREDICCIÓN EN LOTE ---
+def stack_timelines(timelines: list) -> tuple:
+    """
+    Apila los `timeline` de los estados de varios símbolos (uno por fila) en matrices
+    (símbolos, tiempo): los timestamps de cada fila, rellenados al final con
+    `ROW_PADDING`, y {salida: valores} con NaN en el relleno.
+    """
+    length = max([len(ts) for ts, _ in timelines] + [1])
+    stamps = np.full((len(timelines), length), ROW_PADDING, dtype='int64')
+    names = {name for _, values in timelines for name in values}
+    arrays = {name: np.full((len(timelines), length), np.nan) for name in names}
+    for row, (ts, values) in enumerate(timelines):
+        stamps[row, :len(ts)] = ts
+        for name, column in values.items():
+            arrays[name][row, :len(column)] = column
+    return stamps, arrays
+
+def build_live_features_batch(symbols: list, altcoin_data: list, btc_data: dict, eth_data: dict) -> pd.DataFrame:
+    """
+    Matriz símbolo × feature de la vela de 1h en curso de todos los candidatos. Cada estado
+    incremental solo consume sus velas nuevas; después sus salidas recientes se apilan en
+    matrices (símbolos, tiempo) por timeframe y todas las consultas "a fecha" (cada símbolo
+    en su propia última vela de 1h) se resuelven en una pasada vectorizada.
+    Devuelve un DataFrame indexado por símbolo con las features, el ATR de 1h y el precio.
+    """
+    states = {tf: [_advance_state(symbol, tf, data[tf]) if tf in data else None
+                   for symbol, data in zip(symbols, altcoin_data)] for tf in LIVE_INDICATORS}
+    now = np.array([forming[0] for _, forming in states['1h']], dtype='int64')
+    features = {'entry_price': np.array([forming[4] for _, forming in states['1h']])}
+
+    for tf, factories in LIVE_INDICATORS.items():
+        timelines = [entry[0].timeline(entry[1]) if entry else ([], {}) for entry in states[tf]]
+        stamps, values = stack_timelines(timelines)
+        aligned = alignment(now, stamps)
+        for name in factories:
+            column = name if tf == '1h' else f'{name}_{tf}'
+            features[column] = aligned.apply(values[name]) if name in values else np.full(len(symbols), np.nan)
+
+    # Como en el entrenamiento, BTC/ETH se alinean por timestamp exacto de la vela de 1h
+    for market, name, data in [(BTC_SYMBOL, 'btc_change_24h', btc_data), (ETH_SYMBOL, 'eth_change_24h', eth_data)]:
+        state, forming = _advance_state(market, '1h', data['1h'])
+        stamps, values = state.timeline(forming)
+        features[name] = alignment(now, stamps, exact=True).apply(values['change_24h'])
+
+    return pd.DataFrame(features, index=pd.Index(symbols, name='symbol'))
+
+def get_ai_predictions(symbols: list, btc_data, eth_data) -> dict:
     """
-    Orquesta el proceso y devuelve un diccionario con la predicción de la IA,
-    el precio de entrada, y los niveles de SL y TP sugeridos.
+    Descarga a la vez los datos de todos los candidatos, construye la matriz de features de
+    una vez y llama al modelo una sola vez. Devuelve {símbolo: resultado} solo para los
+    símbolos con features completas; los descartados se informan con las features que les faltan.
     """
-    if not model: return None
-
-    altcoin_data = fetch_live_data(symbol)
-    if altcoin_data is None: return None
-
-    live_features_row = create_live_features(altcoin_data, btc_data, eth_data)
-
-    # --- CÁLCULO DE SL/TP ---
-    # Usamos el ATR de 1h para medir la volatilidad
-    atr_series = calculate_atr(altcoin_data['1h']['high'], altcoin_data['1h']['low'], altcoin_data['1h']['close'], length=config.ATR_PERIOD)
-    current_atr = atr_series.iloc[-1]
-    entry_price = altcoin_data['1h']['close'].iloc[-1]
-
-    # Asumimos una operación SHORT basada en la estrategia
-    stop_loss_price = entry_price + (current_atr * config.STOP_LOSS_RR)
-    take_profit_price = entry_price - (current_atr * config.TAKE_PROFIT_RR)
-    # --- FIN DE CÁLCULO ---
-
-    features_for_prediction = [col for col in model.feature_name_ if col in live_features_row.columns]
-    live_features_row = live_features_row[features_for_prediction]
-
-    if live_features_row.isnull().values.any(): return None
-
-    prediction_prob = model.predict_proba(live_features_row)[0]
-    probability_of_win = prediction_prob[1]
-
-    # Devolvemos un diccionario con toda la información
-    return {
-        "win_probability": probability_of_win,
-        "entry_price": entry_price,
-        "stop_loss": stop_loss_price,
-        "take_profit": take_profit_price
-    }
-
-def calculate_atr(high, low, close, length=14):
-    """Calcula el ATR manualmente."""
-    import numpy as np
-    high_low = high - low
-    high_close = np.abs(high - close.shift())
-    low_close = np.abs(low - close.shift())
-    tr = pd.DataFrame({'hl': high_low, 'hc': high_close, 'lc': low_close}).max(axis=1)
-    return tr.ewm(com=length - 1, min_periods=length).mean()
\ No newline at end of file
+    if not model or not symbols: return {}
+
+    # Las descargas heredan el carril de prioridad de quien llama (el carril es por hilo)
+    lane = scheduler.current_lane()
+    def fetch(symbol):
+        with scheduler.lane(lane):
+            return fetch_live_data(symbol)
+    with ThreadPoolExecutor(max_workers=min(config.SCAN_CONCURRENCY, len(symbols))) as pool:
+        fetched = list(zip(symbols, pool.map(fetch, symbols)))
+    for symbol, data in fetched:
+        if data is None: print(f"    - {symbol}: sin datos de velas, se descarta para la IA.")
+    fetched = [(symbol, data) for symbol, data in fetched if data is not None]
+    if not fetched: return {}
+
+    batch = build_live_features_batch([s for s, _ in fetched], [d for _, d in fetched], btc_data, eth_data)
+    feature_cols = [col for col in model.feature_name_ if col in batch.columns]
+    missing = batch[feature_cols + ['atr']].isna()
+    for symbol in batch.index[missing.any(axis=1)]:
+        print(f"    - {symbol}: features incompletas ({', '.join(missing.columns[missing.loc[symbol]])}), se descarta para la IA.")
+    batch = batch[~missing.any(axis=1)]
+    if batch.empty: return {}
+
+    probabilities = model.predict_proba(batch[feature_cols])[:, 1]
+
+    results = {}
+    for (symbol, row), probability_of_win in zip(batch.iterrows(), probabilities):
+        # Operación SHORT basada en la estrategia, con SL/TP por ATR de 1h
+        results[symbol] = {
+            "win_probability": probability_of_win,
+            "entry_price": row['entry_price'],
+            "stop_loss": row['entry_price'] + (row['atr'] * config.STOP_LOSS_RR),
+            "take_profit": row['entry_price'] - (row['atr'] * config.TAKE_PROFIT_RR)
+        }
+    return results
@@ -1,4 +1,3 @@
-import ccxt
 import pandas as pd
 import numpy as np
 import joblib
@@ -7,6 +6,9 @@ import time
 from datetime import datetime, timezone
 import warnings
 import traceback
+from timeframe_derivation import fetch_multi_timeframe
+from ticker_snapshot import ticker_snapshot
+from indicators import rsi, pct_change, distance_from_ma, volume_spike
 
 # --- CONFIGURACIÓN ---
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -25,27 +27,25 @@ RSI_EXTREMO = 80.0
 VOLUMEN_SPIKE = 3.0
 DISTANCIA_MEDIA_EXTREMA = 0.20 # 20% por encima de la media
 
-exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
-
 # --- FUNCIONES ---
 def get_live_features(symbol):
     try:
         data = {}
         timeframes = {'1d': 26, '4h': 26, '1h': 26, '5m': 13}
+        ohlcv_by_tf = fetch_multi_timeframe(symbol, {tf: 50 for tf in timeframes})
         for tf, min_candles in timeframes.items():
-            ohlcv = exchange.fetch_ohlcv(symbol, tf, limit=50)
+            ohlcv = ohlcv_by_tf[tf]
             if len(ohlcv) < min_candles: return None
             df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms'); df.set_index('timestamp', inplace=True); data[tf] = df
         
         df = data['1h'].copy()
-        df['change_24h'] = df['close'].pct_change(periods=24); df['change_1h'] = df['close'].pct_change(periods=1)
-        ma_24h = df['close'].rolling(24).mean(); df['distance_from_ma_24h'] = (df['close'] - ma_24h) / ma_24h
+        close = df['close'].to_numpy()
+        df['change_24h'] = pct_change(close, 24); df['change_1h'] = pct_change(close, 1)
+        df['distance_from_ma_24h'] = distance_from_ma(close, 24)
         for tf_context in ['4h', '1d']:
-            delta = data[tf_context]['close'].diff(1); gain = delta.where(delta > 0, 0); loss = -delta.where(delta < 0, 0)
-            avg_gain = gain.rolling(window=14).mean(); avg_loss = loss.rolling(window=14).mean(); rs = avg_gain / avg_loss
-            data[tf_context][f'rsi_{tf_context}'] = 100 - (100 / (1 + rs))
-        data['5m']['volume_spike_5m'] = data['5m']['volume'] / data['5m']['volume'].rolling(window=12).mean()
+            data[tf_context][f'rsi_{tf_context}'] = rsi(data[tf_context]['close'].to_numpy(), length=14)
+        data['5m']['volume_spike_5m'] = volume_spike(data['5m']['volume'].to_numpy(), 12)
         df = pd.merge_asof(df.sort_index(), data['4h'][['rsi_4h']].sort_index(), on='timestamp', direction='backward')
         df = pd.merge_asof(df.sort_index(), data['1d'][['rsi_1d']].sort_index(), on='timestamp', direction='backward')
         df = pd.merge_asof(df.sort_index(), data['5m'][['volume_spike_5m']].sort_index(), on='timestamp', direction='backward')
@@ -93,12 +93,7 @@ if __name__ == "__main__":
             print(f"Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             print("="*80)
 
-            all_tickers = exchange.fetch_tickers()
-            top_gainers = sorted(
-                [t for t in all_tickers.values() if t['symbol'].endswith('/USDT:USDT') and t.get('percentage')],
-                key=lambda t: t['percentage'],
-                reverse=True
-)
+            top_gainers = ticker_snapshot.top_gainers()
             
 
             # --- INICIO DEL BLOQUE DE DIAGNÓSTICO ---
@@ -2,12 +2,16 @@ import time
 from datetime import datetime, timezone
 import warnings
 import config
-from AnalisisGeneral import run_analisis_general
+from AnalisisGeneral import (run_analisis_general, run_analisis_general_async, run_analisis_general_stream,
+                             obtener_simbolos_liquidos, cerrar_exchange_async)
 from AnalisisDetalle import run_analisis_detalle
 import trade_manager
-from live_ia_engine import get_ai_prediction, fetch_live_data
+from live_ia_engine import get_ai_predictions, fetch_live_data
 import asyncio
 from notifications import send_telegram_alert
+from kline_stream import KlineStream
+from utils import scheduler
+from request_scheduler import LANE_ALERT
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
@@ -36,10 +40,16 @@ def print_report(acceleration_candidates: list, reversal_signals: list):
     else:
         print("(No se han detectado patrones de reversión)")
 
-async def main():
-    """Bucle principal asíncrono que ejecuta el cazador."""
+async def main(stream: KlineStream = None):
+    """
+    Bucle principal asíncrono que ejecuta el cazador. Si se recibe un stream de velas,
+    cada ciclo arranca justo después del cierre de la vela de 5m en lugar de por polling.
+    """
     print(f"--- 🔥 Cazador de Clímax con IA y Alertas de Telegram ---")
-    
+    if stream:
+        print("Esperando al primer cierre de vela del stream...")
+        await stream.wait_for_close()
+
     while True:
         try:
             start_time = time.monotonic()
@@ -47,7 +57,12 @@ async def main():
             print(f"\n--- Análisis a las {now_str} UTC ---")
 
             # --- FASE 1: ANÁLISIS GENERAL ---
-            watchlist = run_analisis_general()
+            if stream:
+                watchlist = run_analisis_general_stream(stream)
+            elif config.SCAN_ASYNC:
+                watchlist = await run_analisis_general_async()
+            else:
+                watchlist = run_analisis_general()
 
             # --- FASE 2 y 3: ANÁLISIS DE DETALLE Y CONSULTA A IA ---
             if watchlist:
@@ -55,46 +70,49 @@ async def main():
                 
                 print("\n--- Procesando señales para Alertas de Telegram ---")
                 if acceleration_candidates:
-                    # Obtenemos datos de BTC/ETH una sola vez para ser eficientes
-                    btc_data = fetch_live_data('BTC/USDT')
-                    eth_data = fetch_live_data('ETH/USDT')
+                    # Obtenemos datos de BTC/ETH una sola vez para ser eficientes (la IA solo usa su 1h)
+                    with scheduler.lane(LANE_ALERT):
+                        btc_data = fetch_live_data('BTC/USDT', ['1h'])
+                        eth_data = fetch_live_data('ETH/USDT', ['1h'])
 
                     if btc_data is None or eth_data is None:
                         print("  -> No se pudo cargar el contexto de mercado (BTC/ETH).")
                     else:
                         sorted_candidates = sorted(acceleration_candidates, key=lambda x: x['score'], reverse=True)
-                        
-                        for cand in sorted_candidates:
-                            # 1. Filtro por Score en vivo
-                            if cand['score'] >= config.TELEGRAM_SCORE_THRESHOLD:
-                                print(f"  -> {cand['symbol']} (Score: {cand['score']:.2f}) califica para análisis de IA...")
+                        # 1. Filtro por Score en vivo
+                        qualified = [c for c in sorted_candidates if c['score'] >= config.TELEGRAM_SCORE_THRESHOLD]
+                        for cand in qualified:
+                            print(f"  -> {cand['symbol']} (Score: {cand['score']:.2f}) califica para análisis de IA...")
+
+                        # 2. Consulta a la IA como filtro de calidad final (todos los candidatos en un lote)
+                        with scheduler.lane(LANE_ALERT):
+                            ai_results = get_ai_predictions([c['symbol'] for c in qualified], btc_data, eth_data)
+
+                        for cand in qualified:
+                            ai_result = ai_results.get(cand['symbol'])
+                            if ai_result and ai_result['win_probability'] >= config.AI_CONFIDENCE_THRESHOLD:
+
+                                win_prob = ai_result['win_probability']
+                                print(f"    - PREDICCIÓN IA (Prob. Éxito): {win_prob * 100:.2f}%")
                                 
-                                # 2. Consulta a la IA como filtro de calidad final
-                                ai_result = get_ai_prediction(cand['symbol'], btc_data, eth_data)
+                                # Formateamos el mensaje para Telegram
+                                mensaje = (
+                                    f"🚨 *Alerta de Clímax con IA* 🚨\n\n"
+                                    f"*Símbolo:* `{cand['symbol']}`\n"
+                                    f"*Dirección:* {'ALCISTA 🟢' if cand['change_15m'] > 0 else 'BAJISTA 🔴'}\n\n"
+                                    f"*Score en Vivo:* `{cand['score']:.2f}`\n"
+                                    f"*Confianza IA:* **{win_prob * 100:.2f}%**\n\n"
+                                    f"*Entrada Sugerida:* `{ai_result['entry_price']:.4f}`\n"
+                                    f"*Stop Loss:* `{ai_result['stop_loss']:.4f}`\n"
+                                    f"*Take Profit:* `{ai_result['take_profit']:.4f}`"
+                                )
+                                # 3. Envío de la Alerta por Telegram
+                                await send_telegram_alert(mensaje)
                                 
-                                if ai_result and ai_result['win_probability'] >= config.AI_CONFIDENCE_THRESHOLD:
-
-                                    win_prob = ai_result['win_probability']
-                                    print(f"    - PREDICCIÓN IA (Prob. Éxito): {win_prob * 100:.2f}%")
-                                    
-                                    # Formateamos el mensaje para Telegram
-                                    mensaje = (
-                                        f"🚨 *Alerta de Clímax con IA* 🚨\n\n"
-                                        f"*Símbolo:* `{cand['symbol']}`\n"
-                                        f"*Dirección:* {'ALCISTA 🟢' if cand['change_15m'] > 0 else 'BAJISTA 🔴'}\n\n"
-                                        f"*Score en Vivo:* `{cand['score']:.2f}`\n"
-                                        f"*Confianza IA:* **{win_prob * 100:.2f}%**\n\n"
-                                        f"*Entrada Sugerida:* `{ai_result['entry_price']:.4f}`\n"
-                                        f"*Stop Loss:* `{ai_result['stop_loss']:.4f}`\n"
-                                        f"*Take Profit:* `{ai_result['take_profit']:.4f}`"
-                                    )
-                                    # 3. Envío de la Alerta por Telegram
-                                    await send_telegram_alert(mensaje)
-                                    
-                                    # 4. (Opcional) Guardar en alertas.json
-                                    # trade_manager.create_ia_alert(cand, ai_result)
-                                else:
-                                    print(f"    - No se pudo obtener una predicción de la IA para {cand['symbol']}.")
+                                # 4. (Opcional) Guardar en alertas.json
+                                # trade_manager.create_ia_alert(cand, ai_result)
+                            else:
+                                print(f"    - No se pudo obtener una predicción de la IA para {cand['symbol']}.")
                 
                 # Imprimimos el reporte en consola al final del ciclo
                 print_report(acceleration_candidates, reversals)
@@ -103,8 +121,13 @@ async def main():
             end_time = time.monotonic()
             duration = end_time - start_time
             sleep_time = config.REFRESH_SECONDS - duration
+            print(f"\nPeticiones al exchange en el ciclo -> {scheduler.report()}")
+            scheduler.reset_stats()
             
-            if sleep_time > 0:
+            if stream:
+                print(f"\nAnálisis completado en {duration:.1f} segundos. Esperando al próximo cierre de vela...")
+                await stream.wait_for_close()
+            elif sleep_time > 0:
                 print(f"\nAnálisis completado en {duration:.1f} segundos. Esperando {sleep_time:.1f} segundos...")
                 await asyncio.sleep(sleep_time)
 
@@ -114,8 +137,20 @@ async def main():
             print(f"Error en el bucle principal: {e}")
             await asyncio.sleep(60)
 
+async def run():
+    """Ejecuta el cazador y libera el stream y el cliente asíncrono del exchange al terminar."""
+    stream = None
+    if config.USE_WS_KLINES:
+        stream = KlineStream(obtener_simbolos_liquidos())
+        stream.start()
+    try:
+        await main(stream)
+    finally:
+        if stream: await stream.stop()
+        await cerrar_exchange_async()
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(run())
     except KeyboardInterrupt:
         pass
\ No newline at end of file
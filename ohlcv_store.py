@@ -0,0 +1,224 @@
+# /ohlcv_store.py
+
+import os
+import glob
+import numpy as np
+import pandas as pd
+import config
+
+# Una fila por vela: timestamp en ms (UTC) y precios/volumen en float64
+OHLCV_DTYPE = np.dtype([
+    ('timestamp', '<i8'), ('open', '<f8'), ('high', '<f8'),
+    ('low', '<f8'), ('close', '<f8'), ('volume', '<f8'),
+])
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def store_symbol(symbol: str) -> str:
+    """'BTC/USDT:USDT' o 'BTC/USDT' -> 'BTCUSDT' (mismo nombre que los CSV de historico)."""
+    return symbol.split(':')[0].replace('/', '')
+
+def to_records(candles) -> np.ndarray:
+    """Convierte velas (lista ccxt, array Nx6 o DataFrame con índice temporal) al dtype del almacén."""
+    if isinstance(candles, pd.DataFrame):
+        index = candles.index
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        records = np.empty(len(candles), dtype=OHLCV_DTYPE)
+        records['timestamp'] = index.values.astype('datetime64[ms]').astype('i8')
+        for col in OHLCV_COLUMNS:
+            records[col] = candles[col].to_numpy(dtype='f8')
+        return records
+
+    array = np.asarray(candles, dtype='f8').reshape(-1, 6)
+    records = np.empty(len(array), dtype=OHLCV_DTYPE)
+    records['timestamp'] = array[:, 0].astype('i8')
+    for i, col in enumerate(OHLCV_COLUMNS, start=1):
+        records[col] = array[:, i]
+    return records
+
+def _month_keys(timestamps: np.ndarray) -> np.ndarray:
+    return timestamps.astype('datetime64[ms]').astype('datetime64[M]')
+
+def _to_ms(value):
+    """Acepta ms, str o datetime como límite de un rango; None significa sin límite."""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    ts = pd.Timestamp(value)
+    if ts.tz is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return ts.value // 1_000_000
+
+class OhlcvStore:
+    """
+    Almacén columnar de velas en disco, particionado como
+    `<root>/<SÍMBOLO>/<timeframe>/<AAAA-MM>.npy`. Cada partición es un array
+    estructurado ordenado por timestamp que se abre con memory-map, así que leer años
+    de histórico es cargar unos pocos ficheros binarios sin parsear texto ni fechas.
+    """
+
+    def __init__(self, root: str = config.OHLCV_STORE_PATH):
+        self.root = root
+
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, store_symbol(symbol), timeframe)
+
+    def _partitions(self, symbol: str, timeframe: str) -> list:
+        return sorted(glob.glob(os.path.join(self._dir(symbol, timeframe), '*.npy')))
+
+    def symbols(self, timeframe: str) -> list:
+        """Símbolos con datos guardados para el timeframe."""
+        if not os.path.isdir(self.root): return []
+        return sorted(s for s in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, s, timeframe)))
+
+    def append(self, symbol: str, timeframe: str, candles) -> int:
+        """
+        Añade velas al almacén. Las velas con un timestamp ya guardado lo reemplazan
+        (útil para la vela que seguía abierta). Devuelve cuántas velas nuevas se añadieron.
+        """
+        records = to_records(candles)
+        if not len(records): return 0
+        records = np.sort(records, order='timestamp', kind='stable')
+        # Ante duplicados dentro del lote gana la última aparición
+        keep = np.append(records['timestamp'][1:] != records['timestamp'][:-1], True)
+        records = records[keep]
+
+        folder = self._dir(symbol, timeframe)
+        os.makedirs(folder, exist_ok=True)
+        months = _month_keys(records['timestamp'])
+        bounds = np.flatnonzero(np.diff(months.astype('i8'))) + 1
+        added = 0
+        for chunk in np.split(records, bounds):
+            path = os.path.join(folder, f"{_month_keys(chunk['timestamp'][:1])[0]}.npy")
+            if os.path.exists(path):
+                existing = np.load(path)
+                stale = np.isin(existing['timestamp'], chunk['timestamp'])
+                added += len(chunk) - int(stale.sum())
+                chunk = np.concatenate([existing[~stale], chunk])
+                chunk = np.sort(chunk, order='timestamp', kind='stable')
+            else:
+                added += len(chunk)
+            # Escritura atómica: un lector nunca ve una partición a medias
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, chunk)
+            os.replace(tmp_path, path)
+        return added
+
+    def read_records(self, symbol: str, timeframe: str, start=None, end=None) -> np.ndarray:
+        """Velas en [start, end] como array estructurado (vacío si no hay datos)."""
+        start, end = _to_ms(start), _to_ms(end)
+        first_month = _month_keys(np.array([start]))[0] if start is not None else None
+        last_month = _month_keys(np.array([end]))[0] if end is not None else None
+
+        chunks = []
+        for path in self._partitions(symbol, timeframe):
+            month = np.datetime64(os.path.basename(path)[:-4], 'M')
+            if (first_month is not None and month < first_month) or (last_month is not None and month > last_month):
+                continue
+            data = np.load(path, mmap_mode='r')
+            lo = np.searchsorted(data['timestamp'], start, side='left') if start is not None else 0
+            hi = np.searchsorted(data['timestamp'], end, side='right') if end is not None else len(data)
+            if hi > lo:
+                chunks.append(data[lo:hi])
+        if not chunks:
+            return np.empty(0, dtype=OHLCV_DTYPE)
+        return np.concatenate(chunks)
+
+    def read(self, symbol: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """Velas en [start, end] como DataFrame indexado por `timestamp` (UTC sin zona)."""
+        records = self.read_records(symbol, timeframe, start, end)
+        index = pd.DatetimeIndex(records['timestamp'].astype('datetime64[ms]'), name='timestamp')
+        return pd.DataFrame({col: records[col] for col in OHLCV_COLUMNS}, index=index)
+
+    def last_timestamp(self, symbol: str, timeframe: str):
+        """Timestamp (ms) de la última vela guardada, o None si no hay datos."""
+        for path in reversed(self._partitions(symbol, timeframe)):
+            data = np.load(path, mmap_mode='r')
+            if len(data): return int(data['timestamp'][-1])
+        return None
+
+def read_csv_ohlcv(path: str) -> pd.DataFrame:
+    """
+    Lee un CSV del formato antiguo de historico. Admite la columna `timestamp_dt`,
+    una columna `timestamp` en ms o, si no, toma la primera columna como fecha.
+    """
+    df = pd.read_csv(path)
+    df.columns = [col.lower() for col in df.columns]
+    if 'timestamp_dt' in df.columns:
+        index = pd.to_datetime(df['timestamp_dt'])
+    elif 'timestamp' in df.columns and pd.api.types.is_numeric_dtype(df['timestamp']):
+        index = pd.to_datetime(df['timestamp'], unit='ms')
+    else:
+        index = pd.to_datetime(df[df.columns[0]])
+    index = pd.DatetimeIndex(index, name='timestamp')
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    df = df[OHLCV_COLUMNS].set_index(index)
+    return df[~df.index.isna()].sort_index()
+
+def migrate_csv_tree(csv_root: str = config.HISTORICO_PATH, store: OhlcvStore = None) -> dict:
+    """
+    Migración única de `<csv_root>/<timeframe>/<SÍMBOLO>.csv` al almacén.
+    Es idempotente: volver a ejecutarla solo reescribe las mismas velas.
+    """
+    store = store or ohlcv_store
+    summary = {'files': 0, 'candles': 0, 'errors': 0}
+    for path in sorted(glob.glob(os.path.join(csv_root, '*', '*.csv'))):
+        timeframe = os.path.basename(os.path.dirname(path))
+        symbol = os.path.splitext(os.path.basename(path))[0]
+        try:
+            df = read_csv_ohlcv(path)
+            store.append(symbol, timeframe, df)
+            summary['files'] += 1
+            summary['candles'] += len(df)
+            print(f"  -> {symbol} [{timeframe}]: {len(df)} velas")
+        except Exception as e:
+            summary['errors'] += 1
+            print(f"  ❌ Error migrando {path}: {e}")
+    return summary
+
+def _sync_csv(symbol: str, timeframe: str, csv_root: str):
+    """
+    Importa el CSV antiguo del símbolo la primera vez y, en cargas posteriores, las velas
+    que se le hayan añadido después de la última guardada. La fecha de modificación del
+    CSV ya importado se anota junto a las particiones para no releerlo si no cambia.
+    """
+    path = os.path.join(csv_root, timeframe, f"{store_symbol(symbol)}.csv")
+    if not os.path.exists(path): return
+    marker = os.path.join(ohlcv_store._dir(symbol, timeframe), '_csv_mtime')
+    mtime = os.path.getmtime(path)
+    last = ohlcv_store.last_timestamp(symbol, timeframe)
+    if last is not None and os.path.exists(marker):
+        with open(marker) as f:
+            if float(f.read() or 0) >= mtime: return
+
+    df = read_csv_ohlcv(path)
+    if last is not None:
+        # Solo la cola: lo que ya está en el almacén (quizá más reciente, del descargador) no se pisa
+        df = df[df.index > pd.Timestamp(last, unit='ms')]
+        if len(df): print(f"ℹ️ {store_symbol(symbol)} [{timeframe}]: {len(df)} velas nuevas del CSV importadas al almacén.")
+    if len(df):
+        ohlcv_store.append(symbol, timeframe, df)
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    tmp_path = marker + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(repr(mtime))
+    os.replace(tmp_path, marker)
+
+def load_ohlcv(symbol: str, timeframe: str, start=None, end=None, csv_root: str = config.HISTORICO_PATH):
+    """
+    Carga velas del almacén. Si el CSV antiguo del símbolo es nuevo o ha cambiado desde
+    la última importación, primero importa sus velas posteriores a las ya guardadas para
+    que la siguiente carga ya sea binaria. Devuelve None si no hay datos.
+    """
+    _sync_csv(symbol, timeframe, csv_root)
+    df = ohlcv_store.read(symbol, timeframe, start, end)
+    return df if not df.empty else None
+
+# Instancia compartida
+ohlcv_store = OhlcvStore()
+
+if __name__ == "__main__":
+    print(f"📦 Migrando CSV de '{config.HISTORICO_PATH}' a '{config.OHLCV_STORE_PATH}'...")
+    result = migrate_csv_tree()
+    print(f"✅ Migración completada: {result['files']} archivos, {result['candles']} velas, {result['errors']} errores.")
@@ -0,0 +1,163 @@
+# /request_scheduler.py
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import config
+
+# --- CARRILES DE PRIORIDAD (menor número = más urgente) ---
+LANE_ALERT = 0       # Fase 3: datos de un candidato fuerte antes de alertar
+LANE_DETAIL = 1      # Fase 2: análisis de detalle de la watchlist
+LANE_SCAN = 2        # Fase 1: escaneo del universo
+LANE_DASHBOARD = 3   # Dashboards y monitores
+LANE_BACKFILL = 4    # Descarga de histórico
+LANE_NAMES = {LANE_ALERT: 'alerta', LANE_DETAIL: 'detalle', LANE_SCAN: 'escaneo',
+              LANE_DASHBOARD: 'dashboard', LANE_BACKFILL: 'histórico'}
+
+WINDOW_SECONDS = 60
+
+def request_weight(method: str, limit: int = None, symbols=None) -> int:
+    """Peso de una petición según las tablas de Binance USDⓈ-M Futures."""
+    if method == 'fetch_ohlcv':
+        limit = limit or 500
+        if limit < 100: return 1
+        if limit < 500: return 2
+        if limit <= 1000: return 5
+        return 10
+    if method == 'fetch_tickers':
+        # ccxt pide siempre el endpoint completo /ticker/24hr y filtra en local
+        return 40
+    return 1
+
+class RequestScheduler:
+    """
+    Planificador de peticiones al exchange con presupuesto de peso por minuto y
+    carriles de prioridad. Cuando el presupuesto se agota, las peticiones esperan
+    y salen en orden de carril (y de llegada dentro de cada carril), de modo que un
+    escaneo masivo nunca deja sin cupo a las peticiones urgentes.
+    """
+
+    def __init__(self, weight_per_minute: int = config.EXCHANGE_WEIGHT_PER_MINUTE):
+        self.weight_per_minute = weight_per_minute
+        self._cond = threading.Condition()
+        self._window = deque()  # (instante, peso) de las peticiones del último minuto
+        self._used = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._local = threading.local()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {lane: {'requests': 0, 'weight': 0, 'wait_total': 0.0, 'wait_max': 0.0} for lane in LANE_NAMES}
+
+    @contextmanager
+    def lane(self, lane: int):
+        """Las peticiones hechas dentro del bloque (en este hilo) usan el carril indicado."""
+        previous = getattr(self._local, 'lane', None)
+        self._local.lane = lane
+        try:
+            yield
+        finally:
+            self._local.lane = previous
+
+    def current_lane(self, default: int = LANE_DETAIL) -> int:
+        lane = getattr(self._local, 'lane', None)
+        return default if lane is None else lane
+
+    def _expire(self, now: float):
+        while self._window and now - self._window[0][0] >= WINDOW_SECONDS:
+            self._used -= self._window.popleft()[1]
+
+    def used_weight(self) -> int:
+        with self._cond:
+            self._expire(time.monotonic())
+            return self._used
+
+    def acquire(self, weight: int, lane: int) -> float:
+        """Bloquea hasta que la petición tenga turno y cupo. Devuelve los segundos en cola."""
+        weight = min(weight, self.weight_per_minute)
+        entry = (lane, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                at_head = self._waiting[0] == entry
+                if at_head and self._used + weight <= self.weight_per_minute:
+                    break
+                # En cabeza pero sin cupo: esperar a que caduque la petición más antigua
+                timeout = WINDOW_SECONDS - (now - self._window[0][0]) if at_head and self._window else None
+                self._cond.wait(timeout)
+
+            heapq.heappop(self._waiting)
+            self._window.append((now, weight))
+            self._used += weight
+            self._cond.notify_all()
+
+            waited = now - start
+            stats = self.stats[lane]
+            stats['requests'] += 1
+            stats['weight'] += weight
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+        return waited
+
+    def observe_server_weight(self, used: int):
+        """
+        Ajusta el consumo con el peso que reporta Binance (cabecera X-MBX-USED-WEIGHT-1M),
+        que incluye lo gastado por otros procesos desde la misma IP.
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._expire(now)
+            if used > self._used:
+                self._window.append((now, used - self._used))
+                self._used = used
+
+    def report(self) -> str:
+        """Resumen por carril de peticiones, peso y tiempo en cola desde el último reset."""
+        parts = []
+        for lane, stats in self.stats.items():
+            if not stats['requests']: continue
+            avg = stats['wait_total'] / stats['requests']
+            parts.append(f"{LANE_NAMES[lane]}: {stats['requests']} req / {stats['weight']} peso "
+                         f"(cola media {avg:.2f}s, máx {stats['wait_max']:.2f}s)")
+        return " | ".join(parts) if parts else "sin peticiones"
+
+class ScheduledExchange:
+    """
+    Envoltorio del cliente ccxt que pasa cada petición de datos de mercado por el
+    planificador. El carril se toma del contexto `scheduler.lane(...)` del hilo actual.
+    """
+
+    def __init__(self, client, scheduler: RequestScheduler, default_lane: int = LANE_DETAIL):
+        self.client = client
+        self.scheduler = scheduler
+        self.default_lane = default_lane
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _call(self, weight: int, fn, *args, **kwargs):
+        self.scheduler.acquire(weight, self.scheduler.current_lane(self.default_lane))
+        result = fn(*args, **kwargs)
+        headers = getattr(self.client, 'last_response_headers', None) or {}
+        for name, value in headers.items():
+            if name.lower() == 'x-mbx-used-weight-1m':
+                self.scheduler.observe_server_weight(int(value))
+                break
+        return result
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        return self._call(request_weight('fetch_ohlcv', limit=limit), self.client.fetch_ohlcv,
+                          symbol, timeframe, since=since, limit=limit, params=params)
+
+    def fetch_ticker(self, symbol, params={}):
+        return self._call(request_weight('fetch_ticker'), self.client.fetch_ticker, symbol, params=params)
+
+    def fetch_tickers(self, symbols=None, params={}):
+        return self._call(request_weight('fetch_tickers', symbols=symbols), self.client.fetch_tickers, symbols, params=params)
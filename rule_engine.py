@@ -0,0 +1,47 @@
+# /rule_engine.py
+
+import numpy as np
+import pandas as pd
+
+# Motor de puntuación por reglas sobre columnas completas.
+#
+# Una regla es una lista de escalones (condiciones, puntos) evaluados como un if/elif:
+# cada fila suma los puntos del primer escalón que cumple y ninguno más de esa regla.
+# Una condición es (columna, operador, umbral); el umbral puede ser un número o
+# (otra_columna, factor) para comparar contra otra columna escalada. Un escalón con
+# varias condiciones exige que se cumplan todas. Los NaN y las columnas ausentes nunca
+# cumplen una condición.
+
+OPERATORS = {
+    '>': np.greater, '>=': np.greater_equal,
+    '<': np.less, '<=': np.less_equal, '==': np.equal,
+}
+
+def _column(df: pd.DataFrame, name: str):
+    return df[name].to_numpy(dtype=np.float64) if name in df.columns else None
+
+def condition_mask(df: pd.DataFrame, condition: tuple) -> np.ndarray:
+    column, op, threshold = condition
+    values = _column(df, column)
+    if isinstance(threshold, tuple):
+        other, factor = threshold
+        threshold = _column(df, other)
+        if threshold is not None: threshold = threshold * factor
+    if values is None or threshold is None:
+        return np.zeros(len(df), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        return OPERATORS[op](values, threshold)
+
+def score(df: pd.DataFrame, rules: dict) -> np.ndarray:
+    """Puntuación entera de cada fila según `rules` ({nombre: [(condiciones, puntos), ...]})."""
+    total = np.zeros(len(df), dtype=np.int64)
+    for tiers in rules.values():
+        pending = np.ones(len(df), dtype=bool)
+        for conditions, points in tiers:
+            if isinstance(conditions, tuple): conditions = [conditions]
+            mask = pending.copy()
+            for condition in conditions:
+                mask &= condition_mask(df, condition)
+            total += points * mask
+            pending &= ~mask
+    return total
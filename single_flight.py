@@ -0,0 +1,116 @@
+# /single_flight.py
+
+import threading
+import time
+
+class _Call:
+    """Llamada en vuelo: los que llegan tarde esperan su resultado en lugar de repetirla."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Agrupa peticiones idénticas: mientras una está en vuelo, las demás con la misma clave
+    esperan y reciben su resultado; después, el resultado se reutiliza durante `ttl` segundos.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._results = {}  # clave -> (instante, resultado)
+        self.stats = {'calls': 0, 'shared': 0}
+
+    def fresh(self, key):
+        """Resultado reciente para `key` (dentro de la ventana de frescura) o None."""
+        with self._lock:
+            return self._fresh(key)
+
+    def _fresh(self, key):
+        entry = self._results.get(key)
+        if entry and time.monotonic() - entry[0] <= self.ttl:
+            return entry[1]
+        return None
+
+    def do(self, key, fn):
+        with self._lock:
+            cached = self._fresh(key)
+            if cached is not None:
+                self.stats['shared'] += 1
+                return cached
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.stats['calls'] += 1
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error: raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if call.error is None:
+                    self._results[key] = (time.monotonic(), call.result)
+                # Limpieza perezosa de resultados caducados
+                if len(self._results) > 1000:
+                    now = time.monotonic()
+                    self._results = {k: v for k, v in self._results.items() if now - v[0] <= self.ttl}
+            call.done.set()
+
+class CoalescedExchange:
+    """
+    Envoltorio del cliente ccxt que deduplica las llamadas de datos de mercado
+    (`fetch_ohlcv`, `fetch_ticker`, `fetch_tickers`) dentro de una ventana de frescura.
+    Una petición de velas recientes también se sirve con el resultado fresco de otra
+    petición del mismo símbolo/timeframe con un `limit` mayor. El resto de atributos
+    se delega en el cliente original.
+    """
+
+    def __init__(self, client, ttl: float):
+        self.client = client
+        self.flight = SingleFlight(ttl)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        if since is None and not params:
+            latest = self.flight.fresh(('fetch_ohlcv', symbol, timeframe, None, 'latest'))
+            if latest is not None and limit is not None and len(latest) >= limit:
+                self.flight.stats['shared'] += 1
+                return list(latest[-limit:])
+
+        key = ('fetch_ohlcv', symbol, timeframe, since, limit, tuple(sorted(params.items())))
+        ohlcv = self.flight.do(key, lambda: self.client.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params))
+        if since is None and not params:
+            self._remember_latest(symbol, timeframe, ohlcv)
+        return list(ohlcv)
+
+    def _remember_latest(self, symbol, timeframe, ohlcv):
+        """Guarda la descarga de velas recientes más larga para servir peticiones más cortas."""
+        key = ('fetch_ohlcv', symbol, timeframe, None, 'latest')
+        with self.flight._lock:
+            current = self.flight._fresh(key)
+            if current is None or len(ohlcv) >= len(current):
+                self.flight._results[key] = (time.monotonic(), ohlcv)
+
+    def fetch_ticker(self, symbol, params={}):
+        key = ('fetch_ticker', symbol, tuple(sorted(params.items())))
+        return self.flight.do(key, lambda: self.client.fetch_ticker(symbol, params=params))
+
+    def fetch_tickers(self, symbols=None, params={}):
+        key = ('fetch_tickers', tuple(symbols) if symbols else None, tuple(sorted(params.items())))
+        return self.flight.do(key, lambda: self.client.fetch_tickers(symbols, params=params))
@@ -0,0 +1,304 @@
+# /streaming_indicators.py
+
+import math
+from collections import deque
+
+# Versiones incrementales de los indicadores de `indicators.py`: cada vela cerrada los
+# avanza en tiempo constante con `update`, `peek` calcula el valor que tendrían con una
+# vela aún abierta sin modificar el estado, y `seed` los calienta con un histórico.
+# Con la misma serie de entrada dan los mismos valores que las funciones vectorizadas.
+
+NAN = float('nan')
+
+class _Indicator:
+    inputs = ('close',)
+
+    def seed(self, rows):
+        """Avanza el indicador con un histórico de entradas (una tupla por vela, en orden)."""
+        value = NAN
+        for row in rows:
+            value = self.update(*row)
+        return value
+
+class EwmMean(_Indicator):
+    """Media exponencial con adjust=True (la de `Series.ewm(...).mean()`)."""
+
+    def __init__(self, com: float = None, span: float = None, alpha: float = None, min_periods: int = 0):
+        if alpha is None:
+            alpha = 1.0 / (1.0 + com) if com is not None else 2.0 / (span + 1.0)
+        self.decay = 1.0 - alpha
+        self.min_periods = max(min_periods, 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.count = 0
+        self.value = NAN
+
+    def _next(self, x: float):
+        if math.isnan(x):
+            return self.decay * self.numerator, self.decay * self.denominator, self.count
+        return x + self.decay * self.numerator, 1.0 + self.decay * self.denominator, self.count + 1
+
+    def _value(self, numerator, denominator, count):
+        return numerator / denominator if count >= self.min_periods else NAN
+
+    def update(self, x: float) -> float:
+        self.numerator, self.denominator, self.count = self._next(x)
+        self.value = self._value(self.numerator, self.denominator, self.count)
+        return self.value
+
+    def peek(self, x: float) -> float:
+        return self._value(*self._next(x))
+
+class EMA(EwmMean):
+    def __init__(self, span: int):
+        super().__init__(span=span)
+
+class MACD(_Indicator):
+    """MACD (EMA rápida - EMA lenta) y su señal. `update`/`peek` devuelven (macd, señal)."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+        self.value = (NAN, NAN)
+
+    def update(self, close: float):
+        macd = self.fast.update(close) - self.slow.update(close)
+        self.value = (macd, self.signal.update(macd))
+        return self.value
+
+    def peek(self, close: float):
+        macd = self.fast.peek(close) - self.slow.peek(close)
+        return macd, self.signal.peek(macd)
+
+class WilderRSI(_Indicator):
+    """RSI de Wilder (alpha = 1/length)."""
+
+    def __init__(self, length: int = 14):
+        self.gain = EwmMean(com=length - 1, min_periods=length)
+        self.loss = EwmMean(com=length - 1, min_periods=length)
+        self.prev_close = NAN
+        self.value = NAN
+
+    @staticmethod
+    def _rsi(avg_gain: float, avg_loss: float) -> float:
+        if math.isnan(avg_gain) or math.isnan(avg_loss): return NAN
+        if avg_loss == 0: return 100.0 if avg_gain > 0 else NAN
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def _moves(self, close: float):
+        # La primera diferencia (sin cierre previo) cuenta como 0, igual que en la versión vectorizada
+        delta = close - self.prev_close
+        return (delta if delta > 0 else 0.0), (-delta if delta < 0 else 0.0)
+
+    def update(self, close: float) -> float:
+        gain, loss = self._moves(close)
+        self.prev_close = close
+        self.value = self._rsi(self.gain.update(gain), self.loss.update(loss))
+        return self.value
+
+    def peek(self, close: float) -> float:
+        gain, loss = self._moves(close)
+        return self._rsi(self.gain.peek(gain), self.loss.peek(loss))
+
+class ATR(_Indicator):
+    """ATR de Wilder."""
+    inputs = ('high', 'low', 'close')
+
+    def __init__(self, length: int = 14):
+        self.mean = EwmMean(com=length - 1, min_periods=length)
+        self.prev_close = NAN
+        self.value = NAN
+
+    def _true_range(self, high: float, low: float) -> float:
+        if math.isnan(self.prev_close): return high - low
+        return max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+    def update(self, high: float, low: float, close: float) -> float:
+        tr = self._true_range(high, low)
+        self.prev_close = close
+        self.value = self.mean.update(tr)
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> float:
+        return self.mean.peek(self._true_range(high, low))
+
+class RollingSum(_Indicator):
+    """Suma de las últimas `window` entradas (NaN hasta llenar la ventana)."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self._updates = 0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        self._updates += 1
+        # Recalcular de vez en cuando evita que se acumule error de redondeo (coste amortizado O(1))
+        if self._updates % self.window == 0:
+            self.total = math.fsum(self.values)
+        self.value = self.total if len(self.values) == self.window else NAN
+        return self.value
+
+    def peek(self, x: float) -> float:
+        if len(self.values) < self.window - 1: return NAN
+        oldest = self.values[0] if len(self.values) == self.window else 0.0
+        return self.total - oldest + x
+
+class RollingMean(RollingSum):
+    def update(self, x: float) -> float:
+        return super().update(x) / self.window
+
+    def peek(self, x: float) -> float:
+        return super().peek(x) / self.window
+
+class PctChange(_Indicator):
+    """Variación relativa respecto a `periods` velas atrás."""
+
+    def __init__(self, periods: int = 1):
+        self.periods = periods
+        self.history = deque(maxlen=periods)
+        self.value = NAN
+
+    def _change(self, x: float) -> float:
+        if len(self.history) < self.periods: return NAN
+        base = self.history[0]
+        return x / base - 1 if base else NAN
+
+    def update(self, x: float) -> float:
+        self.value = self._change(x)
+        self.history.append(x)
+        return self.value
+
+    def peek(self, x: float) -> float:
+        return self._change(x)
+
+class LogReturn(_Indicator):
+    """log(close / close anterior)."""
+
+    def __init__(self):
+        self.prev_close = NAN
+        self.value = NAN
+
+    def _log_return(self, close: float) -> float:
+        if not self.prev_close > 0 or not close > 0: return NAN
+        return math.log(close / self.prev_close)
+
+    def update(self, close: float) -> float:
+        self.value = self._log_return(close)
+        self.prev_close = close
+        return self.value
+
+    def peek(self, close: float) -> float:
+        return self._log_return(close)
+
+class MeanChange(_Indicator):
+    """Media de las últimas `window` diferencias entre cierres (`diff().rolling(window).mean()`)."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.history = deque(maxlen=window)
+        self.value = NAN
+
+    def _mean_change(self, x: float) -> float:
+        # La suma de las diferencias de la ventana se reduce al cierre actual menos el de hace `window` velas
+        if len(self.history) < self.window: return NAN
+        return (x - self.history[0]) / self.window
+
+    def update(self, x: float) -> float:
+        self.value = self._mean_change(x)
+        self.history.append(x)
+        return self.value
+
+    def peek(self, x: float) -> float:
+        return self._mean_change(x)
+
+class DistanceFromMA(_Indicator):
+    """(close - MA) / close."""
+
+    def __init__(self, window: int = 24):
+        self.mean = RollingMean(window)
+        self.value = NAN
+
+    def update(self, close: float) -> float:
+        self.value = (close - self.mean.update(close)) / close
+        return self.value
+
+    def peek(self, close: float) -> float:
+        return (close - self.mean.peek(close)) / close
+
+class VolumeSpike(_Indicator):
+    """Volumen frente a la media de las últimas `window` velas (incluida)."""
+    inputs = ('volume',)
+
+    def __init__(self, window: int = 12):
+        self.mean = RollingMean(window)
+        self.value = NAN
+
+    def update(self, volume: float) -> float:
+        mean = self.mean.update(volume)
+        self.value = volume / mean if mean else NAN
+        return self.value
+
+    def peek(self, volume: float) -> float:
+        mean = self.mean.peek(volume)
+        return volume / mean if mean else NAN
+
+_CANDLE_FIELDS = {'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5}
+
+class StreamingSeries:
+    """
+    Conjunto de indicadores de un (símbolo, timeframe) alimentado con velas cerradas
+    [timestamp, o, h, l, c, v]. Guarda un histórico corto de salidas para consultas
+    "a fecha" y se vuelve a sembrar solo si llega un hueco entre velas.
+    """
+
+    def __init__(self, factories: dict, timeframe_ms: int, history: int = 64):
+        self.factories = factories  # nombre -> función que crea el indicador
+        self.timeframe_ms = timeframe_ms
+        self.history = deque(maxlen=history)  # (timestamp, {nombre: valor})
+        self.last_ts = None
+        self._reset()
+
+    def _reset(self):
+        self.indicators = {name: factory() for name, factory in self.factories.items()}
+        self.history.clear()
+        self.last_ts = None
+
+    def _inputs(self, indicator, candle):
+        return [candle[_CANDLE_FIELDS[field]] for field in indicator.inputs]
+
+    def update(self, candle) -> dict:
+        outputs = {name: ind.update(*self._inputs(ind, candle)) for name, ind in self.indicators.items()}
+        self.history.append((candle[0], outputs))
+        self.last_ts = candle[0]
+        return outputs
+
+    def advance(self, closed_candles: list) -> int:
+        """Consume las velas cerradas nuevas. Devuelve cuántas se procesaron."""
+        new = [c for c in closed_candles if self.last_ts is None or c[0] > self.last_ts]
+        if not new: return 0
+        if self.last_ts is not None and new[0][0] != self.last_ts + self.timeframe_ms:
+            # Hueco: el estado ya no representa la serie, se siembra de nuevo
+            self._reset()
+            new = list(closed_candles)
+        for candle in new:
+            self.update(candle)
+        return len(new)
+
+    def peek(self, candle) -> dict:
+        """Valores con una vela abierta, sin avanzar el estado."""
+        return {name: ind.peek(*self._inputs(ind, candle)) for name, ind in self.indicators.items()}
+
+    def timeline(self, forming=None) -> tuple:
+        """
+        (timestamps en ms, {nombre: valores}) del histórico corto, con la vela abierta
+        `forming` al final (evaluada con `peek`) si se da. Para alinear con `asof_alignment`.
+        """
+        entries = list(self.history)
+        if forming is not None and (not entries or forming[0] > entries[-1][0]):
+            entries.append((forming[0], self.peek(forming)))
+        return [ts for ts, _ in entries], {name: [outputs[name] for _, outputs in entries] for name in self.indicators}
@@ -0,0 +1,59 @@
+# /ticker_snapshot.py
+
+import threading
+import time
+import config
+from utils import exchange
+
+class TickerSnapshot:
+    """
+    Foto del mapa completo de tickers (`fetch_tickers`), descargada como mucho una vez
+    por intervalo y servida desde memoria a todos los consumidores.
+    """
+
+    def __init__(self, client, ttl: float = config.TICKER_SNAPSHOT_TTL):
+        self.client = client
+        self.ttl = ttl
+        self._tickers = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        """Mapa {símbolo: ticker}, refrescado si la foto es más antigua que el TTL."""
+        with self._lock:
+            if self._fetched_at is None or time.monotonic() - self._fetched_at > self.ttl:
+                self._tickers = self.client.fetch_tickers()
+                self._fetched_at = time.monotonic()
+            return self._tickers
+
+    def age(self):
+        """Segundos desde la última descarga (None si aún no se ha descargado)."""
+        if self._fetched_at is None: return None
+        return time.monotonic() - self._fetched_at
+
+    def get_many(self, symbols: list) -> dict:
+        """Tickers de los símbolos pedidos; acepta 'BTC/USDT' y 'BTC/USDT:USDT'."""
+        tickers = self.get()
+        result = {}
+        for symbol in symbols:
+            ticker = tickers.get(symbol) or tickers.get(f"{symbol}:USDT")
+            if ticker: result[symbol] = ticker
+        return result
+
+    def liquid_usdt_perps(self, min_volume: float = config.MIN_24H_VOLUME_USD) -> list:
+        """Perpetuos USDT con volumen 24h por encima de `min_volume`."""
+        return [
+            symbol for symbol, ticker in self.get().items()
+            if symbol.endswith('/USDT:USDT') and (ticker.get('quoteVolume') or 0) > min_volume
+        ]
+
+    def top_gainers(self, n: int = None) -> list:
+        """Perpetuos USDT ordenados por variación 24h, de mayor a menor."""
+        gainers = sorted(
+            [t for t in self.get().values() if t['symbol'].endswith('/USDT:USDT') and t.get('percentage')],
+            key=lambda t: t['percentage'], reverse=True
+        )
+        return gainers[:n] if n else gainers
+
+# Instancia compartida por el bot y los monitores
+ticker_snapshot = TickerSnapshot(exchange)
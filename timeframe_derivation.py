@@ -0,0 +1,48 @@
+# /timeframe_derivation.py
+
+import config
+from utils import resample_ohlcv, timeframe_to_ms
+from candle_cache import fetch_ohlcv_cached
+from request_scheduler import request_weight
+
+def plan_timeframes(limits: dict) -> tuple[dict, dict]:
+    """
+    Decide qué timeframes se descargan y cuáles se construyen localmente.
+    `limits` es {timeframe: velas necesarias}. Un timeframe se deriva de su fuente en
+    DERIVED_TIMEFRAMES solo si la fuente ya se pide y ampliar su histórico no pesa más que
+    descargarlo nativo (Binance cobra las klines por `limit`). Si la fuente necesitaría más
+    de MAX_DERIVATION_SOURCE_LIMIT velas (p. ej. mucho histórico semanal), se pide nativo.
+    Devuelve ({timeframe: limit a descargar}, {timeframe derivado: timeframe fuente}).
+    """
+    needed = dict(limits)
+    derived = {}
+    # De mayor a menor: así la demanda de un derivado se suma a su fuente antes de planificarla.
+    for tf in sorted(needed, key=timeframe_to_ms, reverse=True):
+        source = config.DERIVED_TIMEFRAMES.get(tf)
+        if not source or source not in needed: continue
+        ratio = timeframe_to_ms(tf) // timeframe_to_ms(source)
+        # Una vela destino extra por si el histórico empieza a mitad de vela
+        source_limit = max(needed[source], (needed[tf] + 1) * ratio)
+        if source_limit > config.MAX_DERIVATION_SOURCE_LIMIT: continue
+        extra_weight = request_weight('fetch_ohlcv', limit=source_limit) - request_weight('fetch_ohlcv', limit=needed[source])
+        # A igual peso se deriva: es una llamada menos
+        if extra_weight <= request_weight('fetch_ohlcv', limit=needed[tf]):
+            needed[source] = source_limit
+            derived[tf] = source
+
+    native = {tf: limit for tf, limit in needed.items() if tf not in derived}
+    return native, derived
+
+def fetch_multi_timeframe(symbol: str, limits: dict, fetcher=fetch_ohlcv_cached) -> dict:
+    """
+    Devuelve {timeframe: velas} (mismo formato que `fetch_ohlcv`) para todos los
+    timeframes pedidos, descargando solo los nativos y agregando el resto en local.
+    """
+    native, derived = plan_timeframes(limits)
+    data = {tf: fetcher(symbol, tf, limit=limit) for tf, limit in native.items()}
+
+    for tf in sorted(derived, key=timeframe_to_ms):
+        candles = resample_ohlcv(data[derived[tf]], tf)
+        data[tf] = [[int(c[0]), *c[1:]] for c in candles.tolist()]
+
+    return {tf: data[tf][-limit:] for tf, limit in limits.items()}
@@ -0,0 +1,103 @@
+# /trade_labeler.py
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WIN, LOSS = 1.0, 0.0
+
+def first_touch(high, low, stop_loss, take_profit, horizon: int, side: str = 'short'):
+    """
+    Resuelve a la vez todas las operaciones abiertas al cierre de cada vela: busca la
+    primera de las `horizon` velas siguientes que toca el SL o el TP.
+    SHORT: pierde si high >= SL, gana si low <= TP. LONG: pierde si low <= SL, gana si high >= TP.
+    Si una misma vela toca ambos niveles cuenta como pérdida (se comprueba antes el SL).
+
+    Devuelve (resultado, velas, precio_salida): resultado 1/0 o NaN si no se resuelve en el
+    horizonte (o el SL/TP es NaN), velas hasta la salida (0 si no se resuelve) y el nivel tocado.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    stop_loss = np.asarray(stop_loss, dtype=np.float64)
+    take_profit = np.asarray(take_profit, dtype=np.float64)
+    n = len(high)
+
+    # Fila i: velas i+1 .. i+horizon (relleno NaN al final, que nunca toca un nivel)
+    pad = np.full(horizon, np.nan)
+    future_high = sliding_window_view(np.concatenate([high[1:], pad, [np.nan]]), horizon)[:n]
+    future_low = sliding_window_view(np.concatenate([low[1:], pad, [np.nan]]), horizon)[:n]
+
+    with np.errstate(invalid='ignore'):
+        if side == 'short':
+            sl_hit = future_high >= stop_loss[:, None]
+            tp_hit = future_low <= take_profit[:, None]
+        elif side == 'long':
+            sl_hit = future_low <= stop_loss[:, None]
+            tp_hit = future_high >= take_profit[:, None]
+        else:
+            raise ValueError(f"Lado desconocido: {side}")
+
+    sl_bar = np.where(sl_hit.any(axis=1), sl_hit.argmax(axis=1), horizon)
+    tp_bar = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), horizon)
+    loss = (sl_bar < horizon) & (sl_bar <= tp_bar)
+    win = (tp_bar < horizon) & (tp_bar < sl_bar)
+
+    outcome = np.full(n, np.nan)
+    outcome[loss] = LOSS
+    outcome[win] = WIN
+    bars = np.where(loss, sl_bar + 1, np.where(win, tp_bar + 1, 0))
+    exit_price = np.where(loss, stop_loss, np.where(win, take_profit, np.nan))
+    return outcome, bars, exit_price
+
+def _grid_value(value) -> str:
+    """1.5 -> '1.5', 2.0 -> '2' (para nombres de columna)."""
+    return f"{value:g}"
+
+def label_grid(high, low, entry, atr, tp_multiples: list, sl_multiples: list, horizons: list,
+               side: str = 'short') -> dict:
+    """
+    Targets de una rejilla de configuraciones (múltiplo de TP, múltiplo de SL, horizonte) en
+    una sola pasada: se calculan una vez el máximo y el mínimo acumulados de las velas
+    futuras hasta el horizonte más largo y cada configuración solo cuenta cuántas velas
+    tardan en cruzar sus niveles. Mismas reglas que `first_touch`.
+    Devuelve {f"target_tp{tp}_sl{sl}_h{h}": resultado}.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    entry = np.asarray(entry, dtype=np.float64)
+    atr = np.asarray(atr, dtype=np.float64)
+    n, max_horizon = len(high), max(horizons)
+
+    pad = np.full(max_horizon, np.nan)
+    future_high = sliding_window_view(np.concatenate([high[1:], pad, [np.nan]]), max_horizon)[:n]
+    future_low = sliding_window_view(np.concatenate([low[1:], pad, [np.nan]]), max_horizon)[:n]
+    # Las velas inexistentes (fin de la serie) no pueden tocar ningún nivel
+    running_high = np.fmax.accumulate(np.nan_to_num(future_high, nan=-np.inf), axis=1)
+    running_low = np.fmin.accumulate(np.nan_to_num(future_low, nan=np.inf), axis=1)
+
+    if side not in ('short', 'long'):
+        raise ValueError(f"Lado desconocido: {side}")
+    sign = 1.0 if side == 'short' else -1.0
+
+    # Velas (0..max_horizon) que tarda en tocarse cada nivel: los acumulados son monótonos
+    def bars_to_hit(levels, up: bool):
+        # up: el nivel se toca cuando el máximo acumulado lo alcanza; si no, cuando el mínimo baja hasta él
+        with np.errstate(invalid='ignore'):
+            not_yet = running_high < levels[:, None] if up else running_low > levels[:, None]
+        bars = not_yet.sum(axis=1)
+        bars[np.isnan(levels)] = max_horizon
+        return bars
+
+    sl_bars = {sl: bars_to_hit(entry + sign * atr * sl, up=(side == 'short')) for sl in sl_multiples}
+    tp_bars = {tp: bars_to_hit(entry - sign * atr * tp, up=(side == 'long')) for tp in tp_multiples}
+
+    labels = {}
+    for tp in tp_multiples:
+        for sl in sl_multiples:
+            for h in horizons:
+                loss = (sl_bars[sl] < h) & (sl_bars[sl] <= tp_bars[tp])
+                win = (tp_bars[tp] < h) & (tp_bars[tp] < sl_bars[sl])
+                outcome = np.full(n, np.nan)
+                outcome[loss] = LOSS
+                outcome[win] = WIN
+                labels[f"target_tp{_grid_value(tp)}_sl{_grid_value(sl)}_h{h}"] = outcome
+    return labels
@@ -1,9 +1,29 @@
 import pandas as pd
+import numpy as np
 import ccxt
+import ccxt.async_support as ccxt_async
+import config
+from single_flight import CoalescedExchange
+from request_scheduler import RequestScheduler, ScheduledExchange
 
 # --- INICIALIZACIÓN DEL EXCHANGE ---
-# Lo definimos aquí para que sea accesible desde cualquier parte del sistema
-exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': 'future'}})
+# Lo definimos aquí para que sea accesible desde cualquier parte del sistema.
+# Las peticiones idénticas dentro de la ventana de frescura comparten una sola llamada,
+# y las que sí salen pasan por el planificador de peso con carriles de prioridad
+# (que sustituye al limitador genérico de ccxt).
+scheduler = RequestScheduler()
+exchange = CoalescedExchange(
+    ScheduledExchange(ccxt.binance({'enableRateLimit': False, 'options': {'defaultType': 'future'}}), scheduler),
+    ttl=config.COALESCE_TTL_SECONDS
+)
+
+def create_async_exchange():
+    """
+    Crea un cliente asíncrono de Binance Futuros para los escaneos concurrentes.
+    El limitador interno de ccxt serializa las peticiones, así que se desactiva:
+    la concurrencia la controla quien lo usa (semáforo de SCAN_CONCURRENCY).
+    """
+    return ccxt_async.binance({'enableRateLimit': False, 'options': {'defaultType': 'future'}})
 
 # --- FUNCIONES AUXILIARES ---
 def resample_dataframe(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
@@ -12,4 +32,43 @@ def resample_dataframe(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
         'o': 'first', 'h': 'max', 'l': 'min', 'c': 'last', 'v': 'sum'
     })
     df_resampled.dropna(inplace=True)
-    return df_resampled
\ No newline at end of file
+    return df_resampled
+
+_TIMEFRAME_UNITS_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+def timeframe_to_ms(timeframe: str) -> int:
+    """Convierte un timeframe de ccxt ('5m', '4h', '1w', ...) a milisegundos."""
+    return int(timeframe[:-1]) * _TIMEFRAME_UNITS_MS[timeframe[-1]]
+
+# Las velas semanales de Binance abren el lunes 00:00 UTC; el epoch (1970-01-01) fue jueves.
+_WEEK_OFFSET_MS = 4 * 86_400_000
+
+def resample_ohlcv(ohlcv, timeframe: str, drop_partial_first: bool = True) -> np.ndarray:
+    """
+    Versión vectorizada de `resample_dataframe` sobre arrays [ts, o, h, l, c, v]
+    (timestamps en ms, ordenados). Agrupa por el inicio de cada vela del timeframe
+    destino con la misma alineación que Binance. Si `drop_partial_first`, descarta
+    el primer grupo cuando el histórico empieza a mitad de vela.
+    """
+    arr = np.asarray(ohlcv, dtype=np.float64)
+    if arr.size == 0: return arr.reshape(0, 6)
+
+    ts = arr[:, 0].astype(np.int64)
+    step = timeframe_to_ms(timeframe)
+    offset = _WEEK_OFFSET_MS if timeframe[-1] == 'w' else 0
+    buckets = (ts - offset) // step * step + offset
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(arr)] - 1
+    out = np.column_stack([
+        buckets[starts],
+        arr[starts, 1],
+        np.maximum.reduceat(arr[:, 2], starts),
+        np.minimum.reduceat(arr[:, 3], starts),
+        arr[ends, 4],
+        np.add.reduceat(arr[:, 5], starts),
+    ]).astype(np.float64)
+
+    if drop_partial_first and ts[0] != buckets[0]:
+        out = out[1:]
+    return out